@@ -1,54 +1,472 @@
-from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends, status
+import time
+BOOT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, ReadPreference, UpdateOne, DeleteOne
+from pymongo.errors import DuplicateKeyError
+from pymongo.monitoring import ConnectionPoolListener
+import bson
+import base64
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import bcrypt
 import jwt
 import asyncio
 import json
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+import math
+import importlib
+import sys
+import re
+import zlib
+import hashlib
+import codecs
+import csv
+import xml.etree.ElementTree as ET
+
+if TYPE_CHECKING:
+    import numpy as np
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+class PoolStats(ConnectionPoolListener):
+    """Counts connection pool events across all servers the client talks to."""
+
+    def __init__(self):
+        self.counters = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checked_out": 0,
+            "check_out_failures": 0,
+            "pools_cleared": 0,
+        }
+
+    @property
+    def snapshot(self) -> Dict[str, int]:
+        stats = dict(self.counters)
+        stats["open_connections"] = stats["connections_created"] - stats["connections_closed"]
+        return stats
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.counters["pools_cleared"] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.counters["connections_created"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.counters["connections_closed"] += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.counters["check_out_failures"] += 1
+
+    def connection_checked_out(self, event):
+        self.counters["checked_out"] += 1
+
+    def connection_checked_in(self, event):
+        self.counters["checked_out"] -= 1
+
+READ_PREFERENCE_MODES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+# Read preference per endpoint class; single-document reads always use the primary.
+# Replica reads are opt-in: clients must echo X-Consistency-Token to see their own writes.
+READ_PREFERENCES = {
+    "list": os.environ.get('READ_PREFERENCE_LIST', 'primary'),
+    "analytics": os.environ.get('READ_PREFERENCE_ANALYTICS', 'primary'),
+}
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+CONSISTENCY_HEADER = 'X-Consistency-Token'
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '500'))
+ARCHIVE_INTERVAL_HOURS = float(os.environ.get('ARCHIVE_INTERVAL_HOURS', '0'))
+# Compressed segment size cap, well under Mongo's 16 MB document limit
+ARCHIVE_SEGMENT_MAX_BYTES = int(os.environ.get('ARCHIVE_SEGMENT_MAX_BYTES', str(8 * 1024 * 1024)))
+# Runs still pending/running can receive updates and log pushes, so they stay hot
+ARCHIVABLE_STATUSES = ["completed", "failed", "skipped"]
+INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', '1000'))
+
+pool_stats = PoolStats()
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    event_listeners=[pool_stats]
+)
 db = client[os.environ['DB_NAME']]
+read_dbs = {
+    endpoint_class: client.get_database(os.environ['DB_NAME'], read_preference=READ_PREFERENCE_MODES[mode])
+    for endpoint_class, mode in READ_PREFERENCES.items()
+}
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24
+SYNC_COLLECTIONS = ("projects", "test_cases", "test_executions", "bugs")
+# A reservation older than this is assumed to belong to a write that died
+REVISION_RESERVATION_TIMEOUT = float(os.environ.get('REVISION_RESERVATION_TIMEOUT', '30'))
+
+def parse_rate_limit(name: str, default: str) -> tuple:
+    capacity, per_second = (float(part) for part in os.environ.get(name, default).split(','))
+    if capacity < 1 or per_second <= 0:
+        raise ValueError(f"{name} needs a capacity of at least 1 and a refill rate above 0")
+    return capacity, per_second
+
+# (bucket capacity, refill tokens per second) per route class
+RATE_LIMITS = {
+    "read": parse_rate_limit('RATE_LIMIT_READ', '120,20'),
+    "write": parse_rate_limit('RATE_LIMIT_WRITE', '60,5'),
+    "llm": parse_rate_limit('RATE_LIMIT_LLM', '10,0.2'),
+}
+RATE_LIMIT_SWEEP_SECONDS = float(os.environ.get('RATE_LIMIT_SWEEP_SECONDS', '60'))
+MAX_IN_FLIGHT = {
+    "read": int(os.environ.get('MAX_IN_FLIGHT_READ', '256')),
+    "write": int(os.environ.get('MAX_IN_FLIGHT_WRITE', '128')),
+    "llm": int(os.environ.get('MAX_IN_FLIGHT_LLM', '16')),
+}
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+
+# Seconds spent in each boot phase; see GET /api/stats/startup
+STARTUP_TIMINGS: Dict[str, float] = {}
+LLM_CHAT_MODULE = 'emergentintegrations.llm.chat'
 
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
+REPLAY_RING_SIZE = int(os.environ.get('WS_REPLAY_RING_SIZE', '500'))
+REPLAY_MAX_STREAMS = int(os.environ.get('WS_REPLAY_MAX_STREAMS', '1000'))
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        # Sequences restart with the process; clients resuming from another
+        # boot (a restart or a different worker) always get a snapshot.
+        self.boot_id = uuid.uuid4().hex
+        self.sequence = 0
+        # Per execution: the newest sequence no longer held ("floor") and a
+        # bounded ring of recent messages. Least recently used streams are
+        # evicted first; resuming one of them falls back to a DB snapshot.
+        self.replay_rings: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Per execution: [lock, holders]; see publishing()
+        self.locks: Dict[str, list] = {}
+
+    @asynccontextmanager
+    async def publishing(self, test_id: str):
+        """Hold around a write to an execution and its broadcast, so a snapshot
+        never sees a write whose message is still to come (or vice versa)."""
+        entry = self.locks.setdefault(test_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.locks[test_id]
 
-    async def connect(self, websocket: WebSocket, test_id: str):
+    async def connect(self, websocket: WebSocket, test_id: str, since: Optional[int] = None, boot: Optional[str] = None):
         await websocket.accept()
+        if since is not None:
+            await self.replay(websocket, test_id, since, boot)
         self.active_connections[test_id] = websocket
 
+    async def replay(self, websocket: WebSocket, test_id: str, since: int, boot: Optional[str] = None):
+        ring = self.replay_rings.get(test_id)
+        floor = ring['floor'] if ring else self.sequence
+        if boot != self.boot_id or since < floor or since > self.sequence:
+            async with self.publishing(test_id):
+                execution = await find_execution(test_id)
+                current = self.sequence
+            await websocket.send_json({"type": "snapshot", "seq": current, "boot": self.boot_id, "data": execution})
+            since = current
+        # Keep draining until caught up so messages broadcast while we were
+        # awaiting sends are not lost before the socket is registered.
+        while True:
+            ring = self.replay_rings.get(test_id)
+            pending = [message for message in ring['messages'] if message['seq'] > since] if ring else []
+            if not pending:
+                return
+            for message in pending:
+                await websocket.send_json(message)
+                since = message['seq']
+
     def disconnect(self, test_id: str):
         if test_id in self.active_connections:
             del self.active_connections[test_id]
 
     async def send_message(self, test_id: str, message: dict):
+        ring = self.replay_rings.get(test_id)
+        if ring is None:
+            ring = self.replay_rings[test_id] = {"floor": self.sequence, "messages": deque(maxlen=REPLAY_RING_SIZE)}
+            if len(self.replay_rings) > REPLAY_MAX_STREAMS:
+                self.replay_rings.popitem(last=False)
+        else:
+            self.replay_rings.move_to_end(test_id)
+        
+        self.sequence += 1
+        message = {**message, "seq": self.sequence, "boot": self.boot_id}
+        messages = ring['messages']
+        if len(messages) == messages.maxlen:
+            ring['floor'] = messages[0]['seq']
+        messages.append(message)
+        
         if test_id in self.active_connections:
             await self.active_connections[test_id].send_json(message)
 
 manager = ConnectionManager()
 
+def numpy_module():
+    # Only duplicate detection needs numpy, so keep its import off the boot path
+    module = sys.modules.get('numpy')
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module('numpy')
+        STARTUP_TIMINGS['numpy_import'] = time.perf_counter() - started
+    return module
+
+class BugDuplicateIndex:
+    """In-memory MinHash index of bug titles/descriptions, one signature matrix per project."""
+
+    MERSENNE_PRIME = (1 << 61) - 1
+    TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        self.num_perm = num_perm
+        self.seed = seed
+        # Drawn on first use; see numpy_module()
+        self.perm_a = self.perm_b = None
+        # project_id -> {"matrix": signature rows (over-allocated), "ids": bug id per used row}
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        # Bugs created while their project is still loading, merged in when it is published
+        self.loading: Dict[str, List[tuple]] = {}
+        self.locks: Dict[str, asyncio.Lock] = {}
+
+    def shingles(self, title: str, description: str) -> set:
+        tokens = self.TOKEN_RE.findall(f"{title} {description}".lower())
+        grams = set(tokens)
+        grams.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return grams
+
+    def signature(self, title: str, description: str) -> Optional["np.ndarray"]:
+        grams = self.shingles(title, description)
+        if not grams:
+            return None
+        np = numpy_module()
+        if self.perm_a is None:
+            rng = np.random.default_rng(self.seed)
+            self.perm_a = rng.integers(1, 1 << 31, size=self.num_perm, dtype=np.uint64)
+            self.perm_b = rng.integers(0, 1 << 31, size=self.num_perm, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+        # (a * x + b) mod p for every permutation/shingle pair, then min over shingles
+        hashed = (np.outer(hashes, self.perm_a) + self.perm_b) % np.uint64(self.MERSENNE_PRIME)
+        return hashed.min(axis=0)
+
+    def append(self, index: Dict[str, Any], bug_id: str, title: str, description: str):
+        sig = self.signature(title, description)
+        if sig is None:
+            return
+        matrix = index['matrix']
+        size = len(index['ids'])
+        if size == matrix.shape[0]:
+            np = numpy_module()
+            grown = np.empty((max(16, size * 2), self.num_perm), dtype=np.uint64)
+            grown[:size] = matrix[:size]
+            index['matrix'] = matrix = grown
+        matrix[size] = sig
+        index['ids'].append(bug_id)
+
+    def add(self, project_id: str, bug_id: str, title: str, description: str):
+        if project_id in self.projects:
+            self.append(self.projects[project_id], bug_id, title, description)
+        elif project_id in self.loading:
+            self.loading[project_id].append((bug_id, title, description))
+
+    async def ensure_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        if project_id in self.projects:
+            return self.projects[project_id]
+        lock = self.locks.setdefault(project_id, asyncio.Lock())
+        async with lock:
+            if project_id in self.projects:
+                return self.projects[project_id]
+            # Build privately and publish only once complete so concurrent
+            # queries never search a half-loaded matrix.
+            np = numpy_module()
+            index = {"matrix": np.empty((16, self.num_perm), dtype=np.uint64), "ids": []}
+            self.loading[project_id] = []
+            try:
+                cursor = db.bugs.find(
+                    {"project_id": project_id},
+                    {"_id": 0, "id": 1, "title": 1, "description": 1}
+                )
+                async for bug in cursor:
+                    self.append(index, bug['id'], bug.get('title', ''), bug.get('description', ''))
+                loaded = set(index['ids'])
+                for bug_id, title, description in self.loading[project_id]:
+                    if bug_id not in loaded:
+                        self.append(index, bug_id, title, description)
+            finally:
+                del self.loading[project_id]
+                self.locks.pop(project_id, None)
+            # Nothing is kept for projects without bugs; the next create reloads from the DB
+            if not index['ids']:
+                return None
+            self.projects[project_id] = index
+            return index
+
+    async def query(self, project_id: str, title: str, description: str, limit: int = 5, threshold: float = 0.3, exclude_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        index = await self.ensure_project(project_id)
+        sig = self.signature(title, description)
+        if sig is None or index is None:
+            return []
+        np = numpy_module()
+        ids = index['ids']
+        scores = (index['matrix'][:len(ids)] == sig).mean(axis=1)
+        candidates = np.flatnonzero(scores >= threshold)
+        ranked = candidates[np.argsort(-scores[candidates], kind='stable')]
+        matches = []
+        for idx in ranked:
+            if ids[idx] == exclude_id:
+                continue
+            matches.append({"bug_id": ids[idx], "similarity": round(float(scores[idx]), 4)})
+            if len(matches) >= limit:
+                break
+        return matches
+
+bug_index = BugDuplicateIndex()
+DUPLICATE_THRESHOLD = float(os.environ.get('BUG_DUPLICATE_THRESHOLD', '0.3'))
+
+class DocumentCache:
+    """Bounded LRU read-through cache for single documents, invalidated by local writes.
+
+    A fill that races with an invalidation of the same key is discarded rather
+    than stored. With verify=True (the default) every hit is also checked
+    against the document's revision in Mongo, so writes made by other workers
+    are never served stale; verify=False is only safe with a single worker.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, verify: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self.entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.filling: Dict[tuple, List[int]] = {}
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0, "stale_fills_discarded": 0}
+
+    async def get(self, collection: str, doc_id: str, loader) -> Optional[dict]:
+        key = (collection, doc_id)
+        entry = self.entries.get(key)
+        if entry is not None and self.verify:
+            current = await db[collection].find_one({"id": doc_id}, {"_id": 0, "revision": 1})
+            if current is None or current.get('revision') != entry[0].get('revision'):
+                self.discard(key)
+            # An invalidation or eviction may have removed the entry during the check
+            entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return dict(entry[0])
+        
+        self.stats['misses'] += 1
+        # [concurrent fills, invalidations seen]; a changed generation means a write landed mid-load
+        fill = self.filling.setdefault(key, [0, 0])
+        fill[0] += 1
+        generation = fill[1]
+        try:
+            doc = await loader()
+        finally:
+            fill[0] -= 1
+            if fill[0] == 0:
+                del self.filling[key]
+        if doc is not None:
+            if fill[1] == generation:
+                self.put(collection, doc_id, doc)
+            else:
+                self.stats['stale_fills_discarded'] += 1
+        return doc
+
+    def put(self, collection: str, doc_id: str, doc: dict):
+        key = (collection, doc_id)
+        self.discard(key)
+        size = len(json.dumps(doc, default=str))
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (dict(doc), size)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.stats['evictions'] += 1
+
+    def discard(self, key: tuple):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def invalidate(self, collection: str, doc_id: str):
+        key = (collection, doc_id)
+        self.stats['invalidations'] += 1
+        self.discard(key)
+        if key in self.filling:
+            self.filling[key][1] += 1
+
+    @property
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "verify": self.verify
+        }
+
+doc_cache = DocumentCache(
+    max_entries=int(os.environ.get('DOC_CACHE_MAX_ENTRIES', '2000')),
+    max_bytes=int(os.environ.get('DOC_CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+    verify=os.environ.get('DOC_CACHE_VERIFY', 'true').lower() == 'true'
+)
+
+async def find_test_case(test_id: str) -> Optional[dict]:
+    return await doc_cache.get(
+        "test_cases", test_id,
+        lambda: db.test_cases.find_one({"id": test_id}, {"_id": 0})
+    )
+
 class UserRegister(BaseModel):
     email: EmailStr
     password: str
@@ -133,6 +551,19 @@ class BugCreate(BaseModel):
     severity: str
     assigned_to: Optional[str] = None
 
+class BugDuplicateMatch(BaseModel):
+    bug_id: str
+    similarity: float
+
+class BugWithDuplicates(Bug):
+    possible_duplicates: List[BugDuplicateMatch] = []
+
+class BugDuplicateQuery(BaseModel):
+    project_id: str
+    title: str
+    description: str = ""
+    limit: int = Field(default=5, ge=1, le=50)
+
 class Project(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -153,6 +584,82 @@ class AITestSuggestion(BaseModel):
 class AIAnalyzeResults(BaseModel):
     test_execution_id: str
 
+@asynccontextmanager
+async def reserve_revisions(count: int = 1):
+    """Reserve `count` consecutive revisions, yielding the last one, until the write using them is done.
+
+    The reservation is recorded atomically with the increment so the change
+    feed never hands out a watermark past a revision that may still commit.
+    Each call costs two writes to the single counters/revision document on
+    top of the write it guards, so reserve once per batch where writes come
+    in bursts (CI ingestion, WebSocket log lines).
+    """
+    now = time.time()
+    counter = await db.counters.find_one_and_update(
+        {"_id": "revision"},
+        [
+            {"$set": {"value": {"$add": [{"$ifNull": ["$value", 0]}, count]}}},
+            {"$set": {"pending": {"$concatArrays": [
+                {"$filter": {
+                    "input": {"$ifNull": ["$pending", []]},
+                    "cond": {"$gte": ["$$this.at", now - REVISION_RESERVATION_TIMEOUT]}
+                }},
+                {"$map": {"input": [now], "as": "at", "in": {"rev": {"$subtract": ["$value", count - 1]}, "at": "$$at"}}}
+            ]}}}
+        ],
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    last = counter['value']
+    try:
+        yield last
+    finally:
+        await db.counters.update_one({"_id": "revision"}, {"$pull": {"pending": {"rev": last - count + 1}}})
+
+async def committed_revision() -> int:
+    """Highest revision below which every reserved write has either committed or timed out."""
+    counter = await db.counters.find_one({"_id": "revision"})
+    if not counter:
+        return 0
+    cutoff = time.time() - REVISION_RESERVATION_TIMEOUT
+    pending = [entry['rev'] for entry in counter.get('pending', []) if entry['at'] >= cutoff]
+    return min(pending) - 1 if pending else counter['value']
+
+def llm_chat_module():
+    # The provider SDKs behind emergentintegrations are slow to import, so only
+    # pay for them once an /ai/* route is actually used.
+    module = sys.modules.get(LLM_CHAT_MODULE)
+    if module is None:
+        started = time.perf_counter()
+        module = importlib.import_module(LLM_CHAT_MODULE)
+        STARTUP_TIMINGS['llm_client_import'] = time.perf_counter() - started
+    return module
+
+def encode_consistency_token(session) -> Optional[str]:
+    # Standalone servers report no operation time, so there is nothing to hand out
+    if session.operation_time is None or session.cluster_time is None:
+        return None
+    raw = bson.encode({"operationTime": session.operation_time, "clusterTime": session.cluster_time})
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def set_consistency_token(response: Response, session):
+    token = encode_consistency_token(session)
+    if token:
+        response.headers[CONSISTENCY_HEADER] = token
+
+async def db_session(request: Request):
+    """Causally consistent session, advanced past the client's last write when it sends a token."""
+    async with await client.start_session(causal_consistency=True) as session:
+        token = request.headers.get(CONSISTENCY_HEADER)
+        if token:
+            try:
+                times = bson.decode(base64.urlsafe_b64decode(token.encode('ascii')))
+                session.advance_cluster_time(times['clusterTime'])
+                session.advance_operation_time(times['operationTime'])
+            except Exception:
+                raise HTTPException(status_code=400, detail="Invalid consistency token")
+        yield session
+
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
@@ -168,7 +675,9 @@ def create_jwt_token(user_id: str, email: str) -> str:
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
-    token = credentials.credentials
+    return await user_from_token(credentials.credentials)
+
+async def user_from_token(token: str) -> Dict[str, Any]:
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user = await db.users.find_one({"id": payload['user_id']}, {"_id": 0})
@@ -180,6 +689,97 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+class RateLimiter:
+    """Token buckets per (user, route class) plus an in-flight cap per route class."""
+
+    def __init__(self, backend: str = "memory"):
+        self.backend = backend
+        self.buckets: Dict[tuple, List[float]] = {}
+        self.in_flight: Dict[str, int] = {route_class: 0 for route_class in RATE_LIMITS}
+        self.last_sweep = time.monotonic()
+
+    def sweep(self, now: float):
+        # A bucket that has refilled to capacity behaves exactly like a missing one
+        for key, (tokens, updated) in list(self.buckets.items()):
+            capacity, per_second = RATE_LIMITS[key[1]]
+            if tokens + (now - updated) * per_second >= capacity:
+                del self.buckets[key]
+        self.last_sweep = now
+
+    def take_memory(self, key: tuple, capacity: float, per_second: float) -> float:
+        now = time.monotonic()
+        if now - self.last_sweep >= RATE_LIMIT_SWEEP_SECONDS:
+            self.sweep(now)
+        tokens, updated = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * per_second)
+        if tokens >= 1:
+            self.buckets[key] = [tokens - 1, now]
+            return 0.0
+        self.buckets[key] = [tokens, now]
+        return (1 - tokens) / per_second
+
+    async def take_mongo(self, key: tuple, capacity: float, per_second: float) -> float:
+        now = datetime.now(timezone.utc)
+        # Date minus date is in milliseconds
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]},
+            {"$multiply": [elapsed, per_second]}
+        ]}]}
+        bucket = await db.rate_limits.find_one_and_update(
+            {"_id": ":".join(key)},
+            [
+                # Once refilled the bucket is the same as a missing one, so the TTL index may drop it
+                {"$set": {"tokens": refilled, "updated_at": now, "expires_at": now + timedelta(seconds=capacity / per_second)}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "tokens": {"$cond": [{"$gte": ["$tokens", 1]}, {"$subtract": ["$tokens", 1]}, "$tokens"]}
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if bucket['allowed']:
+            return 0.0
+        return (1 - bucket['tokens']) / per_second
+
+    async def acquire(self, user_id: str, route_class: str):
+        if self.in_flight[route_class] >= MAX_IN_FLIGHT[route_class]:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, try again shortly",
+                headers={"Retry-After": "1"}
+            )
+        
+        capacity, per_second = RATE_LIMITS[route_class]
+        key = (user_id, route_class)
+        if self.backend == "mongo":
+            retry_after = await self.take_mongo(key, capacity, per_second)
+        else:
+            retry_after = self.take_memory(key, capacity, per_second)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+        
+        self.in_flight[route_class] += 1
+
+    def release(self, route_class: str):
+        self.in_flight[route_class] -= 1
+
+rate_limiter = RateLimiter(RATE_LIMIT_BACKEND)
+
+def limited_user(route_class: str):
+    async def dependency(current_user: dict = Depends(get_current_user)):
+        await rate_limiter.acquire(current_user['id'], route_class)
+        try:
+            yield current_user
+        finally:
+            rate_limiter.release(route_class)
+    return dependency
+
 @api_router.post("/auth/register")
 async def register(user_data: UserRegister):
     existing = await db.users.find_one({"email": user_data.email}, {"_id": 0})
@@ -215,11 +815,11 @@ async def login(credentials: UserLogin):
     return {"token": token, "user": user_doc}
 
 @api_router.get("/auth/me")
-async def get_me(current_user: dict = Depends(get_current_user)):
+async def get_me(current_user: dict = Depends(limited_user("read"))):
     return current_user
 
 @api_router.post("/projects", response_model=Project)
-async def create_project(project_data: ProjectCreate, current_user: dict = Depends(get_current_user)):
+async def create_project(project_data: ProjectCreate, response: Response, current_user: dict = Depends(limited_user("write")), session = Depends(db_session)):
     project = Project(
         name=project_data.name,
         description=project_data.description,
@@ -229,14 +829,18 @@ async def create_project(project_data: ProjectCreate, current_user: dict = Depen
     
     doc = project.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
-    await db.projects.insert_one(doc)
+    async with reserve_revisions() as revision:
+        doc['revision'] = revision
+        await db.projects.insert_one(doc, session=session)
+    set_consistency_token(response, session)
     return project
 
 @api_router.get("/projects", response_model=List[Project])
-async def get_projects(current_user: dict = Depends(get_current_user)):
-    projects = await db.projects.find(
+async def get_projects(current_user: dict = Depends(limited_user("read")), session = Depends(db_session)):
+    projects = await read_dbs["list"].projects.find(
         {"team_members": current_user['id']},
-        {"_id": 0}
+        {"_id": 0},
+        session=session
     ).to_list(1000)
     
     for project in projects:
@@ -245,8 +849,96 @@ async def get_projects(current_user: dict = Depends(get_current_user)):
     
     return projects
 
+@api_router.get("/projects/{project_id}/overview")
+async def get_project_overview(
+    project_id: str,
+    test_case_limit: int = 50,
+    bug_limit: int = 20,
+    current_user: dict = Depends(limited_user("read")),
+    session = Depends(db_session)
+):
+    test_case_limit = max(1, min(test_case_limit, 500))
+    bug_limit = max(1, min(bug_limit, 200))
+    
+    pipeline = [
+        {"$match": {"id": project_id, "team_members": current_user['id']}},
+        {"$limit": 1},
+        {"$lookup": {
+            "from": "test_cases",
+            "let": {"project_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$project_id", "$$project_id"]}}},
+                {"$facet": {
+                    "total": [{"$count": "count"}],
+                    "items": [
+                        {"$sort": {"updated_at": -1}},
+                        {"$limit": test_case_limit},
+                        {"$lookup": {
+                            "from": "test_executions",
+                            "let": {"test_case_id": "$id"},
+                            "pipeline": [
+                                {"$match": {"$expr": {"$eq": ["$test_case_id", "$$test_case_id"]}}},
+                                {"$sort": {"start_time": -1}},
+                                {"$limit": 1},
+                                {"$project": {"_id": 0, "id": 1, "status": 1, "start_time": 1, "end_time": 1}}
+                            ],
+                            "as": "latest_execution"
+                        }},
+                        {"$project": {
+                            "_id": 0, "id": 1, "name": 1, "type": 1, "priority": 1, "status": 1, "updated_at": 1,
+                            "latest_execution": {"$arrayElemAt": ["$latest_execution", 0]}
+                        }}
+                    ]
+                }}
+            ],
+            "as": "test_cases"
+        }},
+        {"$lookup": {
+            "from": "bugs",
+            "let": {"project_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$and": [
+                    {"$eq": ["$project_id", "$$project_id"]},
+                    {"$eq": ["$status", "open"]}
+                ]}}},
+                {"$facet": {
+                    "by_severity": [{"$group": {"_id": "$severity", "count": {"$sum": 1}}}],
+                    "recent": [
+                        {"$sort": {"created_at": -1}},
+                        {"$limit": bug_limit},
+                        {"$project": {"_id": 0, "id": 1, "title": 1, "severity": 1, "assigned_to": 1, "created_at": 1}}
+                    ]
+                }}
+            ],
+            "as": "open_bugs"
+        }},
+        {"$project": {"_id": 0, "project": {"id": "$id", "name": "$name", "description": "$description",
+                                            "team_members": "$team_members", "created_by": "$created_by",
+                                            "created_at": "$created_at"},
+                      "test_cases": {"$arrayElemAt": ["$test_cases", 0]},
+                      "open_bugs": {"$arrayElemAt": ["$open_bugs", 0]}}}
+    ]
+    
+    results = await read_dbs["list"].projects.aggregate(pipeline, session=session).to_list(1)
+    if not results:
+        raise HTTPException(status_code=404, detail="Project not found")
+    overview = results[0]
+    
+    test_cases = overview['test_cases']
+    by_severity = {group['_id']: group['count'] for group in overview['open_bugs']['by_severity']}
+    return {
+        "project": overview['project'],
+        "test_cases": test_cases['items'],
+        "test_case_count": test_cases['total'][0]['count'] if test_cases['total'] else 0,
+        "open_bugs": {
+            "total": sum(by_severity.values()),
+            "by_severity": by_severity,
+            "recent": overview['open_bugs']['recent']
+        }
+    }
+
 @api_router.post("/test-cases", response_model=TestCase)
-async def create_test_case(test_data: TestCaseCreate, current_user: dict = Depends(get_current_user)):
+async def create_test_case(test_data: TestCaseCreate, response: Response, current_user: dict = Depends(limited_user("write")), session = Depends(db_session)):
     test_case = TestCase(
         **test_data.model_dump(),
         created_by=current_user['id']
@@ -255,16 +947,21 @@ async def create_test_case(test_data: TestCaseCreate, current_user: dict = Depen
     doc = test_case.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
-    await db.test_cases.insert_one(doc)
+    async with reserve_revisions() as revision:
+        doc['revision'] = revision
+        await db.test_cases.insert_one(doc, session=session)
+    doc.pop('_id', None)
+    doc_cache.put("test_cases", test_case.id, doc)
+    set_consistency_token(response, session)
     return test_case
 
 @api_router.get("/test-cases", response_model=List[TestCase])
-async def get_test_cases(project_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+async def get_test_cases(project_id: Optional[str] = None, current_user: dict = Depends(limited_user("read")), session = Depends(db_session)):
     query = {}
     if project_id:
         query['project_id'] = project_id
     
-    test_cases = await db.test_cases.find(query, {"_id": 0}).to_list(1000)
+    test_cases = await read_dbs["list"].test_cases.find(query, {"_id": 0}, session=session).to_list(1000)
     
     for tc in test_cases:
         if isinstance(tc.get('created_at'), str):
@@ -275,8 +972,8 @@ async def get_test_cases(project_id: Optional[str] = None, current_user: dict =
     return test_cases
 
 @api_router.get("/test-cases/{test_id}", response_model=TestCase)
-async def get_test_case(test_id: str, current_user: dict = Depends(get_current_user)):
-    test_case = await db.test_cases.find_one({"id": test_id}, {"_id": 0})
+async def get_test_case(test_id: str, current_user: dict = Depends(limited_user("read"))):
+    test_case = await find_test_case(test_id)
     if not test_case:
         raise HTTPException(status_code=404, detail="Test case not found")
     
@@ -287,25 +984,418 @@ async def get_test_case(test_id: str, current_user: dict = Depends(get_current_u
     
     return test_case
 
+def compress_segment(executions: List[dict]) -> bytes:
+    ndjson = "\n".join(json.dumps(ex, default=str) for ex in executions)
+    return zlib.compress(ndjson.encode('utf-8'), 6)
+
+def decompress_segment(data: bytes) -> List[dict]:
+    return [json.loads(line) for line in zlib.decompress(data).decode('utf-8').split("\n")]
+
+def split_segments(executions: List[dict]) -> List[tuple]:
+    """Compress into (executions, data) pairs, halving until each fits ARCHIVE_SEGMENT_MAX_BYTES."""
+    data = compress_segment(executions)
+    if len(data) <= ARCHIVE_SEGMENT_MAX_BYTES or len(executions) == 1:
+        return [(executions, data)]
+    middle = len(executions) // 2
+    return split_segments(executions[:middle]) + split_segments(executions[middle:])
+
+def find_in_segment(data: bytes, exec_id: str) -> Optional[dict]:
+    for line in zlib.decompress(data).decode('utf-8').split("\n"):
+        execution = json.loads(line)
+        if execution['id'] == exec_id:
+            return execution
+    return None
+
+async def finish_segment(segment: dict, executions: Optional[List[dict]] = None) -> int:
+    """Drop archived executions from the hot collection and fold them into the rollups.
+
+    Every step is idempotent, so a segment left unfinished by a crash is simply
+    finished again by the next run.
+    """
+    if executions is None:
+        executions = await asyncio.to_thread(decompress_segment, segment['data'])
+    archived_ids = set(segment['execution_ids'])
+    executions = [ex for ex in executions if ex['id'] in archived_ids]
+    # Finished runs can still be patched or receive logs; only delete the
+    # version that was archived and keep any run that changed since.
+    await db.test_executions.bulk_write(
+        [DeleteOne({"id": ex['id'], "revision": ex.get('revision')}) for ex in executions],
+        ordered=False
+    )
+    changed = await db.test_executions.distinct("id", {"id": {"$in": list(archived_ids)}})
+    if changed:
+        # The hot copy stays authoritative and is archived again by a later run
+        await db.test_executions_archive.update_one(
+            {"_id": segment['_id']},
+            {"$pull": {"execution_ids": {"$in": changed}}}
+        )
+        executions = [ex for ex in executions if ex['id'] not in changed]
+    
+    rollups = {}
+    for ex in executions:
+        key = (ex['test_case_id'], ex['start_time'][:10])
+        rollup = rollups.setdefault(key, {"project_id": ex.get('project_id'), "statuses": {}})
+        rollup['statuses'][ex['status']] = rollup['statuses'].get(ex['status'], 0) + 1
+    operations = []
+    for (test_case_id, day), rollup in rollups.items():
+        rollup_id = f"{test_case_id}:{day}"
+        operations.append(UpdateOne(
+            {"_id": rollup_id},
+            {"$setOnInsert": {
+                "test_case_id": test_case_id, "project_id": rollup['project_id'], "day": day,
+                "total": 0, "statuses": {}, "segments": []
+            }},
+            upsert=True
+        ))
+        # Only counts a segment the rollup has not already absorbed
+        operations.append(UpdateOne(
+            {"_id": rollup_id, "segments": {"$ne": segment['_id']}},
+            {
+                "$inc": {
+                    "total": sum(rollup['statuses'].values()),
+                    **{f"statuses.{status_name}": count for status_name, count in rollup['statuses'].items()}
+                },
+                "$push": {"segments": segment['_id']}
+            }
+        ))
+    if operations:
+        await db.execution_rollups.bulk_write(operations)
+    await db.test_executions_archive.update_one(
+        {"_id": segment['_id']},
+        {"$set": {"count": len(executions), "finished": True}}
+    )
+    return len(executions)
+
+async def archive_executions(older_than_days: int = ARCHIVE_AFTER_DAYS) -> Dict[str, int]:
+    """Move executions older than the cutoff into compressed NDJSON segments, keeping per-day rollups hot."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+    archived = 0
+    segments = 0
+    # Segments a previous run stored but did not finish
+    async for segment in db.test_executions_archive.find({"finished": False}):
+        archived += await finish_segment(segment)
+    
+    while True:
+        batch = await db.test_executions.find(
+            {"status": {"$in": ARCHIVABLE_STATUSES}, "start_time": {"$lt": cutoff}},
+            {"_id": 0}
+        ).sort("start_time", 1).limit(ARCHIVE_BATCH_SIZE).to_list(ARCHIVE_BATCH_SIZE)
+        if not batch:
+            break
+        
+        for executions, data in await asyncio.to_thread(split_segments, batch):
+            ids = [ex['id'] for ex in executions]
+            # Content-addressed by id and revision: a retried batch maps to the
+            # same segment, while a run changed since gets a new one.
+            segment_id = hashlib.sha1(
+                "\n".join(f"{ex['id']}:{ex.get('revision')}" for ex in executions).encode('utf-8')
+            ).hexdigest()
+            segment = {
+                "_id": segment_id,
+                "execution_ids": ids,
+                "first_start_time": executions[0]['start_time'],
+                "last_start_time": executions[-1]['start_time'],
+                "count": len(executions),
+                "data": data,
+                "finished": False,
+                "archived_at": datetime.now(timezone.utc).isoformat()
+            }
+            try:
+                await db.test_executions_archive.insert_one(segment)
+                segments += 1
+                archived += await finish_segment(segment, executions)
+            except DuplicateKeyError:
+                segment = await db.test_executions_archive.find_one({"_id": segment_id})
+                archived += await finish_segment(segment)
+    
+    return {"archived": archived, "segments": segments}
+
+async def load_execution(exec_id: str) -> Optional[dict]:
+    execution = await db.test_executions.find_one({"id": exec_id}, {"_id": 0})
+    if execution:
+        return execution
+    # A run archived more than once (changed after an earlier archival) is read from its newest segment
+    segments = await db.test_executions_archive.find(
+        {"execution_ids": exec_id}, {"data": 1}
+    ).sort("archived_at", -1).limit(1).to_list(1)
+    if not segments:
+        return None
+    return await asyncio.to_thread(find_in_segment, segments[0]['data'], exec_id)
+
+async def find_execution(exec_id: str) -> Optional[dict]:
+    return await doc_cache.get("test_executions", exec_id, lambda: load_execution(exec_id))
+
+@api_router.post("/maintenance/archive-executions")
+async def run_execution_archival(older_than_days: int = ARCHIVE_AFTER_DAYS, current_user: dict = Depends(limited_user("write"))):
+    if current_user.get('role') != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    if older_than_days < 1:
+        raise HTTPException(status_code=400, detail="older_than_days must be at least 1")
+    return await archive_executions(older_than_days)
+
 @api_router.post("/test-executions", response_model=TestExecution)
-async def create_test_execution(exec_data: TestExecutionCreate, current_user: dict = Depends(get_current_user)):
+async def create_test_execution(exec_data: TestExecutionCreate, response: Response, current_user: dict = Depends(limited_user("write")), session = Depends(db_session)):
     test_execution = TestExecution(
         test_case_id=exec_data.test_case_id,
         executed_by=current_user['id']
     )
     
+    test_case = await db.test_cases.find_one({"id": exec_data.test_case_id}, {"_id": 0, "project_id": 1})
+    
     doc = test_execution.model_dump()
     doc['start_time'] = doc['start_time'].isoformat()
-    await db.test_executions.insert_one(doc)
+    doc['project_id'] = test_case.get('project_id') if test_case else None
+    async with reserve_revisions() as revision:
+        doc['revision'] = revision
+        await db.test_executions.insert_one(doc, session=session)
+    set_consistency_token(response, session)
     return test_execution
 
+class ReportError(ValueError):
+    """A CI report that cannot be parsed; the message names the format and the problem."""
+
+async def iter_junit_results(chunks):
+    """Yield one result per <testcase>, discarding each element once read so memory stays flat."""
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack = []
+    async for chunk in chunks:
+        try:
+            parser.feed(chunk)
+            events = list(parser.read_events())
+        except ET.ParseError as e:
+            raise ReportError(f"Invalid JUnit XML: {e}")
+        for event, elem in events:
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if elem.tag != "testcase":
+                if elem.tag == "testsuite" and stack:
+                    stack[-1].remove(elem)
+                continue
+            
+            status_name = "completed"
+            message = None
+            output = []
+            for child in elem:
+                if child.tag in ("failure", "error"):
+                    status_name = "failed"
+                    message = child.get('message') or (child.text or "").strip() or child.tag
+                    if child.text and child.text.strip():
+                        output.append(child.text.strip())
+                elif child.tag == "skipped":
+                    status_name = "skipped"
+                    message = child.get('message') or "skipped"
+                elif child.tag in ("system-out", "system-err") and child.text:
+                    output.extend(line for line in child.text.splitlines() if line.strip())
+            
+            classname = elem.get('classname')
+            name = elem.get('name', 'unnamed')
+            try:
+                duration = float(elem.get('time') or 0)
+            except ValueError:
+                raise ReportError(f"Invalid JUnit XML: testcase '{name}' has non-numeric time '{elem.get('time')}'")
+            yield {
+                "name": f"{classname}.{name}" if classname else name,
+                "status": status_name,
+                "duration": duration,
+                "message": message,
+                "logs": output
+            }
+            if stack:
+                stack[-1].remove(elem)
+    try:
+        parser.close()
+    except ET.ParseError as e:
+        raise ReportError(f"Invalid JUnit XML: {e}")
+
+CSV_STATUSES = {"passed": "completed", "pass": "completed", "ok": "completed", "completed": "completed",
+                "failed": "failed", "fail": "failed", "error": "failed",
+                "skipped": "skipped", "skip": "skipped"}
+
+async def iter_csv_results(chunks):
+    """Yield one result per CSV row; columns are name, status and optional duration, message, logs."""
+    # utf-8-sig drops the BOM that Excel and many CI exporters prepend
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ""
+    header = None
+    
+    def rows(text: str, final: bool):
+        # Only hand complete records to the csv module: a newline inside an
+        # open quoted field (odd quote count so far) does not end the record.
+        records = []
+        start = 0
+        quotes = 0
+        for index, char in enumerate(text):
+            if char == '"':
+                quotes += 1
+            elif char == "\n" and quotes % 2 == 0:
+                records.append(text[start:index + 1])
+                start = index + 1
+                quotes = 0
+        rest = text[start:]
+        if final and rest.strip():
+            records.append(rest)
+            rest = ""
+        # Blank lines come back as empty rows; they carry no result
+        try:
+            return [row for row in csv.reader(records) if any(field.strip() for field in row)], rest
+        except csv.Error as e:
+            raise ReportError(f"Invalid CSV report: {e}")
+    
+    def decode(chunk: bytes, final: bool = False) -> str:
+        try:
+            return decoder.decode(chunk, final)
+        except UnicodeDecodeError as e:
+            raise ReportError(f"Invalid CSV report: {e}")
+    
+    async for chunk in chunks:
+        parsed, pending = rows(pending + decode(chunk), final=False)
+        for row in parsed:
+            if header is None:
+                header = [column.strip().lower() for column in row]
+                continue
+            yield csv_result(header, row)
+    parsed, _ = rows(pending + decode(b"", final=True), final=True)
+    for row in parsed:
+        if header is None:
+            header = [column.strip().lower() for column in row]
+            continue
+        yield csv_result(header, row)
+
+def csv_result(header: List[str], row: List[str]) -> dict:
+    record = dict(zip(header, row))
+    if 'name' not in record or 'status' not in record:
+        raise ReportError("Invalid CSV report: needs 'name' and 'status' columns")
+    status_name = CSV_STATUSES.get(record['status'].strip().lower())
+    if status_name is None:
+        raise ReportError(f"Invalid CSV report: unknown status '{record['status']}'")
+    try:
+        duration = float(record.get('duration') or 0)
+    except ValueError:
+        raise ReportError(f"Invalid CSV report: non-numeric duration '{record['duration']}' for '{record['name']}'")
+    return {
+        "name": record['name'],
+        "status": status_name,
+        "duration": duration,
+        "message": record.get('message') or None,
+        "logs": [line for line in (record.get('logs') or "").splitlines() if line.strip()]
+    }
+
+async def ingest_batch(project_id: str, results: List[dict], current_user: dict) -> int:
+    names = list({result['name'] for result in results})
+    # Newest first so that, where names repeat, the oldest test case wins consistently
+    test_case_ids = {
+        tc['name']: tc['id']
+        for tc in await db.test_cases.find(
+            {"project_id": project_id, "name": {"$in": names}},
+            {"_id": 0, "id": 1, "name": 1}
+        ).sort("created_at", -1).to_list(None)
+    }
+    
+    missing = [name for name in names if name not in test_case_ids]
+    count = len(missing) + len(results)
+    created = 0
+    async with reserve_revisions(count) as last:
+        revision = last - count
+        if missing:
+            upserts = []
+            for name in missing:
+                test_case = TestCase(
+                    project_id=project_id,
+                    name=name,
+                    description="Imported from CI report",
+                    type="automated",
+                    steps=[],
+                    expected_result="Test passes",
+                    created_by=current_user['id']
+                )
+                doc = test_case.model_dump()
+                doc['created_at'] = doc['created_at'].isoformat()
+                doc['updated_at'] = doc['updated_at'].isoformat()
+                doc['source'] = "ci"
+                revision += 1
+                doc['revision'] = revision
+                # Upserts on the unique (project_id, name) index for CI cases, so
+                # concurrent ingests of one report agree on a single test case
+                upserts.append(UpdateOne(
+                    {"project_id": project_id, "name": name, "source": "ci"},
+                    {"$setOnInsert": doc},
+                    upsert=True
+                ))
+            result = await db.test_cases.bulk_write(upserts, ordered=False)
+            created = result.upserted_count
+            test_case_ids.update({
+                tc['name']: tc['id']
+                for tc in await db.test_cases.find(
+                    {"project_id": project_id, "name": {"$in": missing}, "source": "ci"},
+                    {"_id": 0, "id": 1, "name": 1}
+                ).to_list(len(missing))
+            })
+    
+        executions = []
+        for result in results:
+            execution = TestExecution(
+                test_case_id=test_case_ids[result['name']],
+                status=result['status'],
+                logs=result['logs'],
+                executed_by=current_user['id'],
+                result=result['message'] or ("passed" if result['status'] == "completed" else result['status'])
+            )
+            execution.end_time = execution.start_time + timedelta(seconds=result['duration'])
+            doc = execution.model_dump()
+            doc['start_time'] = doc['start_time'].isoformat()
+            doc['end_time'] = doc['end_time'].isoformat()
+            doc['project_id'] = project_id
+            revision += 1
+            doc['revision'] = revision
+            executions.append(doc)
+        await db.test_executions.insert_many(executions, ordered=False)
+    return created
+
+@api_router.post("/projects/{project_id}/ingest")
+async def ingest_report(project_id: str, request: Request, format: Optional[str] = None, current_user: dict = Depends(limited_user("write"))):
+    project = await db.projects.find_one({"id": project_id, "team_members": current_user['id']}, {"_id": 0, "id": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    if format is None:
+        format = "csv" if "csv" in request.headers.get('content-type', '') else "junit"
+    if format not in ("junit", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'junit' or 'csv'")
+    results = iter_junit_results(request.stream()) if format == "junit" else iter_csv_results(request.stream())
+    
+    # Counts only what has been written, so a failure part-way can report it
+    summary = {"executions": 0, "test_cases_created": 0, "completed": 0, "failed": 0, "skipped": 0}
+    
+    async def flush(batch: List[dict]):
+        summary['test_cases_created'] += await ingest_batch(project_id, batch, current_user)
+        summary['executions'] += len(batch)
+        for result in batch:
+            summary[result['status']] += 1
+    
+    batch = []
+    try:
+        async for result in results:
+            batch.append(result)
+            if len(batch) >= INGEST_BATCH_SIZE:
+                await flush(batch)
+                batch = []
+    except ReportError as e:
+        # Earlier batches are already stored; tell the caller exactly what was kept
+        raise HTTPException(status_code=400, detail={"message": str(e), "committed": summary})
+    if batch:
+        await flush(batch)
+    
+    return summary
+
 @api_router.get("/test-executions", response_model=List[TestExecution])
-async def get_test_executions(test_case_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+async def get_test_executions(test_case_id: Optional[str] = None, current_user: dict = Depends(limited_user("read")), session = Depends(db_session)):
     query = {}
     if test_case_id:
         query['test_case_id'] = test_case_id
     
-    executions = await db.test_executions.find(query, {"_id": 0}).to_list(1000)
+    executions = await read_dbs["list"].test_executions.find(query, {"_id": 0}, session=session).to_list(1000)
     
     for ex in executions:
         if isinstance(ex.get('start_time'), str):
@@ -316,8 +1406,8 @@ async def get_test_executions(test_case_id: Optional[str] = None, current_user:
     return executions
 
 @api_router.get("/test-executions/{exec_id}", response_model=TestExecution)
-async def get_test_execution(exec_id: str, current_user: dict = Depends(get_current_user)):
-    execution = await db.test_executions.find_one({"id": exec_id}, {"_id": 0})
+async def get_test_execution(exec_id: str, current_user: dict = Depends(limited_user("read"))):
+    execution = await find_execution(exec_id)
     if not execution:
         raise HTTPException(status_code=404, detail="Test execution not found")
     
@@ -329,42 +1419,69 @@ async def get_test_execution(exec_id: str, current_user: dict = Depends(get_curr
     return execution
 
 @api_router.patch("/test-executions/{exec_id}")
-async def update_test_execution(exec_id: str, update_data: TestExecutionUpdate, current_user: dict = Depends(get_current_user)):
+async def update_test_execution(exec_id: str, update_data: TestExecutionUpdate, response: Response, current_user: dict = Depends(limited_user("write")), session = Depends(db_session)):
     update_dict = {k: v for k, v in update_data.model_dump().items() if v is not None}
     
     if update_data.status == "completed" or update_data.status == "failed":
         update_dict['end_time'] = datetime.now(timezone.utc).isoformat()
     
-    await db.test_executions.update_one(
-        {"id": exec_id},
-        {"$set": update_dict}
-    )
-    
-    execution = await db.test_executions.find_one({"id": exec_id}, {"_id": 0})
-    await manager.send_message(exec_id, {"type": "update", "data": execution})
+    async with manager.publishing(exec_id):
+        async with reserve_revisions() as revision:
+            update_dict['revision'] = revision
+            await db.test_executions.update_one(
+                {"id": exec_id},
+                {"$set": update_dict},
+                session=session
+            )
+        doc_cache.invalidate("test_executions", exec_id)
+        
+        # Only the changing fields are broadcast (and kept in the replay ring);
+        # logs arrive as their own messages and a resume snapshot has the rest.
+        execution = await db.test_executions.find_one(
+            {"id": exec_id},
+            {"_id": 0, "id": 1, "status": 1, "result": 1, "end_time": 1},
+            session=session
+        )
+        await manager.send_message(exec_id, {"type": "update", "data": execution})
     
+    set_consistency_token(response, session)
     return {"message": "Updated successfully"}
 
-@api_router.post("/bugs", response_model=Bug)
-async def create_bug(bug_data: BugCreate, current_user: dict = Depends(get_current_user)):
+@api_router.post("/bugs", response_model=BugWithDuplicates)
+async def create_bug(bug_data: BugCreate, response: Response, current_user: dict = Depends(limited_user("write")), session = Depends(db_session)):
     bug = Bug(
         **bug_data.model_dump(),
         reported_by=current_user['id']
     )
     
+    # Matches reveal other bugs' ids, so only members of the project get them
+    member = await db.projects.find_one({"id": bug.project_id, "team_members": current_user['id']}, {"_id": 0, "id": 1})
+    duplicates = await bug_index.query(bug.project_id, bug.title, bug.description, threshold=DUPLICATE_THRESHOLD) if member else []
+    
     doc = bug.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
-    await db.bugs.insert_one(doc)
-    return bug
+    async with reserve_revisions() as revision:
+        doc['revision'] = revision
+        await db.bugs.insert_one(doc, session=session)
+    set_consistency_token(response, session)
+    bug_index.add(bug.project_id, bug.id, bug.title, bug.description)
+    return BugWithDuplicates(**bug.model_dump(), possible_duplicates=duplicates)
+
+@api_router.post("/bugs/duplicates", response_model=List[BugDuplicateMatch])
+async def find_duplicate_bugs(query: BugDuplicateQuery, current_user: dict = Depends(limited_user("read"))):
+    project = await db.projects.find_one({"id": query.project_id, "team_members": current_user['id']}, {"_id": 0, "id": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return await bug_index.query(query.project_id, query.title, query.description, limit=query.limit, threshold=DUPLICATE_THRESHOLD)
 
 @api_router.get("/bugs", response_model=List[Bug])
-async def get_bugs(project_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+async def get_bugs(project_id: Optional[str] = None, current_user: dict = Depends(limited_user("read")), session = Depends(db_session)):
     query = {}
     if project_id:
         query['project_id'] = project_id
     
-    bugs = await db.bugs.find(query, {"_id": 0}).to_list(1000)
+    bugs = await read_dbs["list"].bugs.find(query, {"_id": 0}, session=session).to_list(1000)
     
     for bug in bugs:
         if isinstance(bug.get('created_at'), str):
@@ -375,16 +1492,24 @@ async def get_bugs(project_id: Optional[str] = None, current_user: dict = Depend
     return bugs
 
 @api_router.get("/stats/dashboard")
-async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
-    projects = await db.projects.find({"team_members": current_user['id']}).to_list(1000)
+async def get_dashboard_stats(current_user: dict = Depends(limited_user("read")), session = Depends(db_session)):
+    reader = read_dbs["analytics"]
+    projects = await reader.projects.find({"team_members": current_user['id']}, session=session).to_list(1000)
     project_ids = [p['id'] for p in projects]
     
-    total_tests = await db.test_cases.count_documents({"project_id": {"$in": project_ids}})
-    total_executions = await db.test_executions.count_documents({})
+    total_tests = await reader.test_cases.count_documents({"project_id": {"$in": project_ids}}, session=session)
+    total_executions = await reader.test_executions.count_documents({}, session=session)
+    archived_totals = await reader.execution_rollups.aggregate(
+        [{"$group": {"_id": None, "total": {"$sum": "$total"}}}],
+        session=session
+    ).to_list(1)
+    if archived_totals:
+        total_executions += archived_totals[0]['total']
     
-    recent_executions = await db.test_executions.find(
+    recent_executions = await reader.test_executions.find(
         {},
-        {"_id": 0}
+        {"_id": 0},
+        session=session
     ).sort("start_time", -1).limit(10).to_list(10)
     
     for ex in recent_executions:
@@ -393,8 +1518,8 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
         if ex.get('end_time') and isinstance(ex['end_time'], str):
             ex['end_time'] = datetime.fromisoformat(ex['end_time'])
     
-    total_bugs = await db.bugs.count_documents({"project_id": {"$in": project_ids}})
-    open_bugs = await db.bugs.count_documents({"project_id": {"$in": project_ids}, "status": "open"})
+    total_bugs = await reader.bugs.count_documents({"project_id": {"$in": project_ids}}, session=session)
+    open_bugs = await reader.bugs.count_documents({"project_id": {"$in": project_ids}, "status": "open"}, session=session)
     
     return {
         "total_tests": total_tests,
@@ -404,16 +1529,76 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
         "open_bugs": open_bugs
     }
 
+@api_router.get("/sync/changes")
+async def get_changes(since: int = 0, limit: int = 500, current_user: dict = Depends(limited_user("read")), session = Depends(db_session)):
+    limit = max(1, min(limit, 1000))
+    # Taken before reading so nothing committed afterwards can sit below the cap
+    committed = await committed_revision()
+    project_ids = await db.projects.distinct("id", {"team_members": current_user['id']}, session=session)
+    
+    changes = {}
+    full_watermarks = []
+    watermark = since
+    for name in SYNC_COLLECTIONS:
+        if name == "projects":
+            scope = {"team_members": current_user['id']}
+        else:
+            scope = {"project_id": {"$in": project_ids}}
+        docs = await db[name].find(
+            {**scope, "revision": {"$gt": since}},
+            {"_id": 0},
+            session=session
+        ).sort("revision", 1).limit(limit).to_list(limit)
+        changes[name] = docs
+        if docs:
+            watermark = max(watermark, docs[-1]['revision'])
+            if len(docs) == limit:
+                full_watermarks.append(docs[-1]['revision'])
+    
+    # A truncated collection may still hold revisions below the others' maximum,
+    # so only advance the watermark as far as the shortest truncated page.
+    if full_watermarks:
+        watermark = min(full_watermarks)
+    # Never move past a revision that may still be committed by an in-flight write
+    watermark = max(since, min(watermark, committed))
+    
+    return {
+        "watermark": watermark,
+        "has_more": bool(full_watermarks),
+        **changes
+    }
+
+@api_router.get("/stats/pool")
+async def get_pool_stats(current_user: dict = Depends(limited_user("read"))):
+    return {
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+        "min_pool_size": MONGO_MIN_POOL_SIZE,
+        "read_preferences": READ_PREFERENCES,
+        **pool_stats.snapshot
+    }
+
+@api_router.get("/stats/cache")
+async def get_cache_stats(current_user: dict = Depends(limited_user("read"))):
+    return doc_cache.snapshot
+
+@api_router.get("/stats/startup")
+async def get_startup_stats(current_user: dict = Depends(limited_user("read"))):
+    return {
+        "timings": STARTUP_TIMINGS,
+        "llm_client_loaded": LLM_CHAT_MODULE in sys.modules
+    }
+
 @api_router.post("/ai/suggest-tests")
-async def suggest_tests(request: AITestSuggestion, current_user: dict = Depends(get_current_user)):
+async def suggest_tests(request: AITestSuggestion, current_user: dict = Depends(limited_user("llm"))):
     try:
-        chat = LlmChat(
+        llm = await asyncio.to_thread(llm_chat_module)
+        chat = llm.LlmChat(
             api_key=os.environ['EMERGENT_LLM_KEY'],
             session_id=f"test-suggest-{request.test_case_id}",
             system_message="You are a QA expert. Analyze test cases and suggest improvements, edge cases, and additional test scenarios."
         ).with_model("openai", "gpt-4o")
         
-        user_message = UserMessage(text=request.prompt)
+        user_message = llm.UserMessage(text=request.prompt)
         response = await chat.send_message(user_message)
         
         return {"suggestion": response}
@@ -421,15 +1606,16 @@ async def suggest_tests(request: AITestSuggestion, current_user: dict = Depends(
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post("/ai/analyze-results")
-async def analyze_results(request: AIAnalyzeResults, current_user: dict = Depends(get_current_user)):
+async def analyze_results(request: AIAnalyzeResults, current_user: dict = Depends(limited_user("llm"))):
     try:
-        execution = await db.test_executions.find_one({"id": request.test_execution_id}, {"_id": 0})
+        execution = await find_execution(request.test_execution_id)
         if not execution:
             raise HTTPException(status_code=404, detail="Test execution not found")
         
-        test_case = await db.test_cases.find_one({"id": execution['test_case_id']}, {"_id": 0})
+        test_case = await find_test_case(execution['test_case_id'])
         
-        chat = LlmChat(
+        llm = await asyncio.to_thread(llm_chat_module)
+        chat = llm.LlmChat(
             api_key=os.environ['EMERGENT_LLM_KEY'],
             session_id=f"analyze-{request.test_execution_id}",
             system_message="You are a QA expert. Analyze test execution results, identify patterns, and provide insights."
@@ -445,7 +1631,7 @@ Logs: {execution.get('logs', [])}
 
 Provide detailed analysis and recommendations."""
         
-        user_message = UserMessage(text=prompt)
+        user_message = llm.UserMessage(text=prompt)
         response = await chat.send_message(user_message)
         
         return {"analysis": response}
@@ -453,22 +1639,50 @@ Provide detailed analysis and recommendations."""
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.websocket("/ws/test-execution/{exec_id}")
-async def websocket_endpoint(websocket: WebSocket, exec_id: str):
-    await manager.connect(websocket, exec_id)
+async def websocket_endpoint(websocket: WebSocket, exec_id: str, token: str = "", since: Optional[int] = None, boot: Optional[str] = None):
+    # Browsers can't set an Authorization header on a WebSocket, so the JWT comes as a query param
+    try:
+        await user_from_token(token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await manager.connect(websocket, exec_id, since, boot)
+    # Lines that arrive while a write is in flight go out together in the next
+    # one, so a burst costs one revision reservation rather than one per line.
+    queued: List[dict] = []
+    writer: Optional[asyncio.Task] = None
+    
+    async def write_logs():
+        while queued:
+            batch = queued[:]
+            del queued[:]
+            async with manager.publishing(exec_id):
+                async with reserve_revisions() as revision:
+                    await db.test_executions.update_one(
+                        {"id": exec_id},
+                        {"$push": {"logs": {"$each": [message['content'] for message in batch]}}, "$set": {"revision": revision}}
+                    )
+                doc_cache.invalidate("test_executions", exec_id)
+                for message in batch:
+                    await manager.send_message(exec_id, message)
+    
     try:
         while True:
             data = await websocket.receive_text()
             message = json.loads(data)
             
             if message['type'] == 'log':
-                await db.test_executions.update_one(
-                    {"id": exec_id},
-                    {"$push": {"logs": message['content']}}
-                )
-                await manager.send_message(exec_id, message)
+                queued.append(message)
+                if writer is None or writer.done():
+                    if writer is not None:
+                        writer.result()
+                    writer = asyncio.create_task(write_logs())
             
     except WebSocketDisconnect:
         manager.disconnect(exec_id)
+        # Lines already received are still stored
+        if writer is not None:
+            await writer
 
 app.include_router(api_router)
 
@@ -478,6 +1692,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CONSISTENCY_HEADER, "Retry-After"],
 )
 
 logging.basicConfig(
@@ -486,6 +1701,106 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+STARTUP_TIMINGS['module_import'] = time.perf_counter() - BOOT_STARTED
+
+@app.on_event("startup")
+async def create_sync_indexes():
+    await db.projects.create_index([("team_members", 1), ("revision", 1)])
+    for name in SYNC_COLLECTIONS[1:]:
+        await db[name].create_index([("project_id", 1), ("revision", 1)])
+    # Every write sets project_id and revision now, so the backfills only ever need to finish once
+    if not await db.counters.find_one({"_id": "sync_backfill"}):
+        await backfill_execution_projects()
+        await backfill_revisions()
+        await db.counters.update_one({"_id": "sync_backfill"}, {"$set": {"done": True}}, upsert=True)
+
+@app.on_event("startup")
+async def create_ingest_indexes():
+    # Manually created test cases may share names; only CI-created ones are matched by name
+    await db.test_cases.create_index(
+        [("project_id", 1), ("name", 1)],
+        unique=True,
+        partialFilterExpression={"source": "ci"}
+    )
+
+@app.on_event("startup")
+async def create_overview_indexes():
+    # Back the correlated $lookup stages in get_project_overview
+    await db.test_cases.create_index([("project_id", 1), ("updated_at", -1)])
+    await db.test_executions.create_index([("test_case_id", 1), ("start_time", -1)])
+    await db.bugs.create_index([("project_id", 1), ("status", 1), ("created_at", -1)])
+
+async def backfill_execution_projects():
+    # Executions created before the change feed existed carry no project_id,
+    # so the feed could never scope them to a project. Dropping the revision
+    # hands them to backfill_revisions for a fresh one clients have not passed.
+    test_case_ids = await db.test_executions.distinct("test_case_id", {"project_id": {"$exists": False}})
+    for tc in await db.test_cases.find({"id": {"$in": test_case_ids}}, {"_id": 0, "id": 1, "project_id": 1}).to_list(None):
+        await db.test_executions.update_many(
+            {"test_case_id": tc['id'], "project_id": {"$exists": False}},
+            {"$set": {"project_id": tc['project_id']}, "$unset": {"revision": ""}}
+        )
+
+async def backfill_revisions():
+    # Documents written before the change feed existed never match `revision > since`.
+    # Each gets its own revision, since a page boundary inside a run of equal
+    # revisions would skip the rest of the run.
+    for name in SYNC_COLLECTIONS:
+        while True:
+            docs = await db[name].find({"revision": {"$exists": False}}, {"_id": 1}).limit(INGEST_BATCH_SIZE).to_list(INGEST_BATCH_SIZE)
+            if not docs:
+                break
+            async with reserve_revisions(len(docs)) as last:
+                first = last - len(docs) + 1
+                await db[name].bulk_write([
+                    UpdateOne({"_id": doc['_id'], "revision": {"$exists": False}}, {"$set": {"revision": first + offset}})
+                    for offset, doc in enumerate(docs)
+                ], ordered=False)
+
+async def archive_loop():
+    while True:
+        await asyncio.sleep(ARCHIVE_INTERVAL_HOURS * 3600)
+        try:
+            result = await archive_executions()
+            logger.info("Archived %d executions into %d segments", result['archived'], result['segments'])
+        except Exception:
+            logger.exception("Execution archival failed")
+
+@app.on_event("startup")
+async def create_rate_limit_indexes():
+    if rate_limiter.backend == "mongo":
+        await db.rate_limits.create_index("expires_at", expireAfterSeconds=0)
+        # Buckets from before expires_at existed would never expire; dropping one only refills it
+        await db.rate_limits.delete_many({"expires_at": {"$exists": False}})
+
+@app.on_event("startup")
+async def create_cache_indexes():
+    if doc_cache.verify:
+        # Lets the per-hit revision check be answered from the index alone
+        await db.test_cases.create_index([("id", 1), ("revision", 1)])
+        await db.test_executions.create_index([("id", 1), ("revision", 1)])
+
+@app.on_event("startup")
+async def start_archival():
+    await db.test_executions.create_index([("status", 1), ("start_time", 1)])
+    await db.test_executions_archive.create_index([("execution_ids", 1), ("archived_at", -1)])
+    await db.test_executions_archive.create_index("finished", partialFilterExpression={"finished": False})
+    if ARCHIVE_INTERVAL_HOURS > 0:
+        asyncio.create_task(archive_loop())
+
+@app.on_event("startup")
+async def report_startup():
+    STARTUP_TIMINGS['startup'] = time.perf_counter() - BOOT_STARTED
+    logger.info(
+        "Startup profile: %s",
+        ", ".join(f"{phase}={seconds * 1000:.1f}ms" for phase, seconds in STARTUP_TIMINGS.items())
+    )
+    # numpy is small enough to always warm, off the event loop, before the first bug is filed
+    asyncio.get_running_loop().run_in_executor(None, numpy_module)
+    if os.environ.get('PRELOAD_LLM_CLIENT', 'false').lower() == 'true':
+        # Warm the LLM client off the event loop once the worker is already serving
+        asyncio.get_running_loop().run_in_executor(None, llm_chat_module)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
\ No newline at end of file
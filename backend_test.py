@@ -292,6 +292,52 @@ class DevQAAPITester:
         )
         return success
 
+    def test_find_duplicate_bugs(self):
+        """Test duplicate bug lookup"""
+        if not self.project_id:
+            print("❌ No project ID available for duplicate lookup")
+            return False
+            
+        query_data = {
+            "project_id": self.project_id,
+            "title": "Test Bug",
+            "description": "This is a test bug report for API testing"
+        }
+        
+        success, response = self.run_test(
+            "Find Duplicate Bugs",
+            "POST",
+            "bugs/duplicates",
+            200,
+            data=query_data
+        )
+        
+        if success and self.bug_id:
+            if not any(match['bug_id'] == self.bug_id for match in response):
+                print("❌ Created bug not reported as a duplicate")
+                return False
+        return success
+
+    def test_project_overview(self):
+        """Test composite project overview"""
+        if not self.project_id:
+            print("❌ No project ID available for overview")
+            return False
+            
+        success, response = self.run_test(
+            "Get Project Overview",
+            "GET",
+            f"projects/{self.project_id}/overview",
+            200
+        )
+        
+        if success:
+            for key in ("project", "test_cases", "open_bugs"):
+                if key not in response:
+                    print(f"❌ Overview missing '{key}'")
+                    return False
+        return success
+
     def test_dashboard_stats(self):
         """Test getting dashboard statistics"""
         success, response = self.run_test(
@@ -302,6 +348,27 @@ class DevQAAPITester:
         )
         return success
 
+    def test_sync_changes(self):
+        """Test delta sync change feed"""
+        success, response = self.run_test(
+            "Get Sync Changes",
+            "GET",
+            "sync/changes?since=0",
+            200
+        )
+        
+        if success:
+            if 'watermark' not in response:
+                print("❌ Change feed missing watermark")
+                return False
+            success, response = self.run_test(
+                "Get Sync Changes Since Watermark",
+                "GET",
+                f"sync/changes?since={response['watermark']}",
+                200
+            )
+        return success
+
     def test_ai_suggest_tests(self):
         """Test AI test suggestions"""
         if not self.test_case_id:
@@ -359,7 +426,10 @@ def main():
         ("Get Test Executions", tester.test_get_test_executions),
         ("Create Bug", tester.test_create_bug),
         ("Get Bugs", tester.test_get_bugs),
+        ("Find Duplicate Bugs", tester.test_find_duplicate_bugs),
+        ("Project Overview", tester.test_project_overview),
         ("Dashboard Stats", tester.test_dashboard_stats),
+        ("Sync Changes", tester.test_sync_changes),
         ("AI Test Suggestions", tester.test_ai_suggest_tests),
         ("AI Result Analysis", tester.test_ai_analyze_results),
     ]
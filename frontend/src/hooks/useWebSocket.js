@@ -1,21 +1,67 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
+import { getToken } from '../utils/auth';
 
 const useWebSocket = (testExecutionId) => {
   const [logs, setLogs] = useState([]);
   const [ws, setWs] = useState(null);
+  const lastSeq = useRef(null);
+  const lastBoot = useRef(null);
 
   useEffect(() => {
     if (!testExecutionId) return;
 
     const wsUrl = process.env.REACT_APP_BACKEND_URL.replace('https://', 'wss://').replace('http://', 'ws://');
-    const socket = new WebSocket(`${wsUrl}/api/ws/test-execution/${testExecutionId}`);
+    let socket;
+    let reconnectTimer;
+    let closed = false;
+    lastSeq.current = null;
+    lastBoot.current = null;
+    setLogs([]);
 
-    socket.onopen = () => {
-      console.log('WebSocket connected');
+    const connect = () => {
+      const params = new URLSearchParams({ token: getToken() || '' });
+      // Resume from the last sequence we saw so the server only replays what we missed;
+      // a different boot id (restart or another worker) makes it send a snapshot instead.
+      if (lastSeq.current !== null) {
+        params.set('since', lastSeq.current);
+        params.set('boot', lastBoot.current);
+      }
+      socket = new WebSocket(`${wsUrl}/api/ws/test-execution/${testExecutionId}?${params}`);
+
+      socket.onopen = () => {
+        console.log('WebSocket connected');
+      };
+
+      socket.onmessage = handleMessage;
+
+      socket.onerror = (error) => {
+        console.error('WebSocket error:', error);
+      };
+
+      socket.onclose = () => {
+        console.log('WebSocket disconnected');
+        if (!closed) {
+          reconnectTimer = setTimeout(connect, 1000);
+        }
+      };
+
+      setWs(socket);
     };
 
-    socket.onmessage = (event) => {
+    const handleMessage = (event) => {
       const message = JSON.parse(event.data);
+      if (message.type === 'snapshot') {
+        // A snapshot replaces local state and resets the sequence, e.g. after a server restart
+        lastSeq.current = message.seq;
+        lastBoot.current = message.boot;
+        setLogs(message.data?.logs || []);
+        return;
+      }
+      if (message.seq !== undefined) {
+        if (message.boot === lastBoot.current && lastSeq.current !== null && message.seq <= lastSeq.current) return;
+        lastSeq.current = message.seq;
+        lastBoot.current = message.boot;
+      }
       if (message.type === 'log') {
         setLogs((prev) => [...prev, message.content]);
       } else if (message.type === 'update') {
@@ -23,17 +69,11 @@ const useWebSocket = (testExecutionId) => {
       }
     };
 
-    socket.onerror = (error) => {
-      console.error('WebSocket error:', error);
-    };
-
-    socket.onclose = () => {
-      console.log('WebSocket disconnected');
-    };
-
-    setWs(socket);
+    connect();
 
     return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
       socket.close();
     };
   }, [testExecutionId]);
@@ -7,16 +7,30 @@ const api = axios.create({
   baseURL: API,
 });
 
+// Latest causal-consistency token from a write; sent on every request so
+// reads served by replicas still include this client's own writes.
+const CONSISTENCY_HEADER = 'x-consistency-token';
+let consistencyToken = null;
+
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('token');
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
   }
+  if (consistencyToken) {
+    config.headers[CONSISTENCY_HEADER] = consistencyToken;
+  }
   return config;
 });
 
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const nextToken = response.headers?.[CONSISTENCY_HEADER];
+    if (nextToken) {
+      consistencyToken = nextToken;
+    }
+    return response;
+  },
   (error) => {
     if (error.response?.status === 401) {
       localStorage.removeItem('token');
@@ -0,0 +1,214 @@
+import asyncio
+import copy
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+from pymongo import DeleteOne  # noqa: E402
+from pymongo.errors import DuplicateKeyError  # noqa: E402
+
+
+def matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            for op, arg in condition.items():
+                if op == "$in" and not (set(value) & set(arg) if isinstance(value, list) else value in arg):
+                    return False
+                if op == "$lt" and not (value is not None and value < arg):
+                    return False
+                if op == "$ne" and (arg in value if isinstance(value, list) else value == arg):
+                    return False
+        elif isinstance(value, list):
+            if condition not in value:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def apply_update(doc, update, inserted):
+    for field, value in update.get("$setOnInsert", {}).items() if inserted else ():
+        doc[field] = copy.deepcopy(value)
+    for field, value in update.get("$set", {}).items():
+        doc[field] = value
+    for path, amount in update.get("$inc", {}).items():
+        target, _, key = path.rpartition(".")
+        holder = doc[target] if target else doc
+        holder[key] = holder.get(key, 0) + amount
+    for field, value in update.get("$push", {}).items():
+        doc.setdefault(field, []).append(value)
+    for field, condition in update.get("$pull", {}).items():
+        doc[field] = [value for value in doc.get(field, []) if value not in condition["$in"]]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.before_delete = None
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([copy.deepcopy(doc) for doc in self.docs if matches(doc, query or {})])
+
+    async def find_one(self, query, projection=None):
+        found = [doc for doc in self.docs if matches(doc, query)]
+        return copy.deepcopy(found[0]) if found else None
+
+    async def distinct(self, field, query):
+        return [doc[field] for doc in self.docs if matches(doc, query)]
+
+    async def insert_one(self, doc):
+        if any(existing["_id"] == doc["_id"] for existing in self.docs):
+            raise DuplicateKeyError("duplicate _id")
+        self.docs.append(copy.deepcopy(doc))
+
+    async def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if matches(doc, query):
+                apply_update(doc, update, inserted=False)
+                return
+        if upsert:
+            doc = dict(query)
+            apply_update(doc, update, inserted=True)
+            self.docs.append(doc)
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.before_delete and any(isinstance(op, DeleteOne) for op in operations):
+            hook, self.before_delete = self.before_delete, None
+            hook()
+        for op in operations:
+            if isinstance(op, DeleteOne):
+                found = [doc for doc in self.docs if matches(doc, op._filter)]
+                if found:
+                    self.docs.remove(found[0])
+            else:
+                await self.update_one(op._filter, op._doc, upsert=op._upsert)
+
+
+class FakeDb:
+    def __init__(self):
+        self.test_executions = FakeCollection()
+        self.test_executions_archive = FakeCollection()
+        self.execution_rollups = FakeCollection()
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    fake = FakeDb()
+    monkeypatch.setattr(server, "db", fake)
+    return fake
+
+
+def add_execution(fake_db, exec_id, status="completed", day="2020-01-01", revision=1, logs=None):
+    fake_db.test_executions.docs.append({
+        "id": exec_id, "test_case_id": "tc-1", "project_id": "p1", "status": status,
+        "start_time": f"{day}T00:00:00+00:00", "logs": logs or [], "revision": revision
+    })
+
+
+def rollup_total(fake_db):
+    return {doc["_id"]: (doc["total"], doc["statuses"]) for doc in fake_db.execution_rollups.docs}
+
+
+def test_archives_only_old_finished_runs_and_reads_them_back(fake_db):
+    add_execution(fake_db, "done", status="completed", logs=["ok"])
+    add_execution(fake_db, "broken", status="failed")
+    add_execution(fake_db, "running", status="running")
+    add_execution(fake_db, "recent", status="completed", day="2999-01-01")
+
+    result = asyncio.run(server.archive_executions(older_than_days=30))
+
+    assert result == {"archived": 2, "segments": 1}
+    assert sorted(doc["id"] for doc in fake_db.test_executions.docs) == ["recent", "running"]
+    assert rollup_total(fake_db) == {"tc-1:2020-01-01": (2, {"completed": 1, "failed": 1})}
+    assert asyncio.run(server.load_execution("done"))["logs"] == ["ok"]
+    assert asyncio.run(server.load_execution("running"))["status"] == "running"
+    assert asyncio.run(server.load_execution("missing")) is None
+
+
+def test_unfinished_segment_is_completed_once_by_the_next_run(fake_db, monkeypatch):
+    add_execution(fake_db, "e1")
+    add_execution(fake_db, "e2", status="failed")
+    finish_segment = server.finish_segment
+
+    async def crash_before_marking(segment, executions=None):
+        # Rollups and deletes land, but the process dies before the segment is marked finished
+        await finish_segment(segment, executions)
+        await fake_db.test_executions_archive.update_one({"_id": segment["_id"]}, {"$set": {"finished": False}})
+        raise RuntimeError("worker died")
+
+    monkeypatch.setattr(server, "finish_segment", crash_before_marking)
+    with pytest.raises(RuntimeError):
+        asyncio.run(server.archive_executions(older_than_days=30))
+    monkeypatch.setattr(server, "finish_segment", finish_segment)
+
+    assert asyncio.run(server.archive_executions(older_than_days=30)) == {"archived": 2, "segments": 0}
+    assert asyncio.run(server.archive_executions(older_than_days=30)) == {"archived": 0, "segments": 0}
+    assert rollup_total(fake_db) == {"tc-1:2020-01-01": (2, {"completed": 1, "failed": 1})}
+    assert all(segment["finished"] for segment in fake_db.test_executions_archive.docs)
+
+
+def test_run_changed_during_archival_stays_hot_and_is_archived_later(fake_db):
+    add_execution(fake_db, "e1")
+    add_execution(fake_db, "e2", logs=["first"])
+
+    def late_log_push():
+        doc = next(doc for doc in fake_db.test_executions.docs if doc["id"] == "e2")
+        doc["logs"].append("late")
+        doc["revision"] = 2
+
+    fake_db.test_executions.before_delete = late_log_push
+    assert asyncio.run(server.archive_executions(older_than_days=30))["archived"] == 2
+
+    # The second pass of the same call picked up the changed run in a new segment
+    assert fake_db.test_executions.docs == []
+    assert len(fake_db.test_executions_archive.docs) == 2
+    assert [segment["execution_ids"] for segment in fake_db.test_executions_archive.docs] == [["e1"], ["e2"]]
+    assert rollup_total(fake_db) == {"tc-1:2020-01-01": (2, {"completed": 2})}
+    assert asyncio.run(server.load_execution("e2"))["logs"] == ["first", "late"]
+
+
+def test_segments_are_split_by_compressed_size(fake_db, monkeypatch):
+    for index in range(8):
+        add_execution(fake_db, f"e{index}", logs=[os.urandom(600).hex()])
+    monkeypatch.setattr(server, "ARCHIVE_SEGMENT_MAX_BYTES", 2000)
+
+    result = asyncio.run(server.archive_executions(older_than_days=30))
+
+    segments = fake_db.test_executions_archive.docs
+    assert result == {"archived": 8, "segments": len(segments)}
+    assert len(segments) > 1
+    assert all(len(segment["data"]) <= 2000 for segment in segments)
+    assert sorted(i for segment in segments for i in segment["execution_ids"]) == [f"e{index}" for index in range(8)]
+    assert rollup_total(fake_db) == {"tc-1:2020-01-01": (8, {"completed": 8})}
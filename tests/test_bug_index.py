@@ -0,0 +1,127 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+
+LOGIN_BUG = ("Login button unresponsive on Safari", "Clicking the login button on Safari does nothing")
+
+
+class FakeCursor:
+    def __init__(self, docs, on_iterate=None):
+        self.docs = docs
+        self.on_iterate = on_iterate
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for doc in self.docs:
+            if self.on_iterate:
+                self.on_iterate()
+            await asyncio.sleep(0)
+            yield doc
+
+
+class FakeBugs:
+    def __init__(self, docs, on_iterate=None):
+        self.docs = docs
+        self.on_iterate = on_iterate
+        self.loads = 0
+
+    def find(self, query, projection=None):
+        self.loads += 1
+        return FakeCursor([doc for doc in self.docs if doc["project_id"] == query["project_id"]], self.on_iterate)
+
+
+def use_bugs(monkeypatch, bugs):
+    fake_db = type("FakeDb", (), {})()
+    fake_db.bugs = bugs
+    monkeypatch.setattr(server, "db", fake_db)
+
+
+def bug(bug_id, title, description, project_id="p1"):
+    return {"id": bug_id, "project_id": project_id, "title": title, "description": description}
+
+
+def test_similar_reports_rank_above_unrelated_ones(monkeypatch):
+    use_bugs(monkeypatch, FakeBugs([
+        bug("b1", *LOGIN_BUG),
+        bug("b2", "Report export produces empty CSV", "Exported CSV has headers only"),
+        bug("b3", "Login button unresponsive", "Clicking the login button on Chrome does nothing"),
+        bug("other", *LOGIN_BUG, project_id="p2"),
+    ]))
+    index = server.BugDuplicateIndex()
+
+    matches = asyncio.run(index.query("p1", *LOGIN_BUG, threshold=0.3))
+
+    assert [m["bug_id"] for m in matches] == ["b1", "b3"]
+    assert matches[0]["similarity"] == 1.0
+    assert matches[0]["similarity"] > matches[1]["similarity"] >= 0.3
+    excluded = asyncio.run(index.query("p1", *LOGIN_BUG, threshold=0.3, exclude_id="b1"))
+    assert [m["bug_id"] for m in excluded] == ["b3"]
+
+
+def test_query_without_tokens_matches_nothing(monkeypatch):
+    use_bugs(monkeypatch, FakeBugs([bug("b1", *LOGIN_BUG)]))
+    assert asyncio.run(server.BugDuplicateIndex().query("p1", "!!!", "", threshold=0.0)) == []
+
+
+def test_project_is_loaded_once_and_grows_with_new_bugs(monkeypatch):
+    bugs = FakeBugs([bug("b1", *LOGIN_BUG)])
+    use_bugs(monkeypatch, bugs)
+    index = server.BugDuplicateIndex()
+    asyncio.run(index.query("p1", *LOGIN_BUG))
+
+    # Past the initial 16 rows the matrix is reallocated
+    for number in range(40):
+        index.add("p1", f"n{number}", f"Crash number {number} in scheduler", "")
+
+    matches = asyncio.run(index.query("p1", "Crash number 39 in scheduler", "", limit=50, threshold=0.99))
+    assert [m["bug_id"] for m in matches] == ["n39"]
+    assert len(index.projects["p1"]["ids"]) == 41
+    assert bugs.loads == 1
+
+
+def test_concurrent_queries_share_one_load_and_keep_bugs_added_meanwhile(monkeypatch):
+    index = server.BugDuplicateIndex()
+    added = []
+
+    def add_once():
+        # A bug is created while the project is still being read
+        if not added:
+            added.append(True)
+            index.add("p1", "b-new", *LOGIN_BUG)
+
+    bugs = FakeBugs([bug("b1", "Report export produces empty CSV", "headers only")], on_iterate=add_once)
+    use_bugs(monkeypatch, bugs)
+
+    async def run():
+        return await asyncio.gather(*(index.query("p1", *LOGIN_BUG) for _ in range(3)))
+
+    results = asyncio.run(run())
+
+    assert bugs.loads == 1
+    assert all([m["bug_id"] for m in result] == ["b-new"] for result in results)
+    assert index.loading == {} and index.locks == {}
+
+
+def test_empty_project_is_not_cached(monkeypatch):
+    bugs = FakeBugs([])
+    use_bugs(monkeypatch, bugs)
+    index = server.BugDuplicateIndex()
+
+    assert asyncio.run(index.query("p1", *LOGIN_BUG)) == []
+    # Bugs added to an unloaded project are picked up by the next load instead
+    index.add("p1", "b1", *LOGIN_BUG)
+    bugs.docs.append(bug("b1", *LOGIN_BUG))
+
+    assert [m["bug_id"] for m in asyncio.run(index.query("p1", *LOGIN_BUG))] == ["b1"]
+    assert "p1" in index.projects and bugs.loads == 2
@@ -0,0 +1,129 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+
+
+def loader_for(doc, calls):
+    async def load():
+        calls.append(doc["id"])
+        return dict(doc)
+    return load
+
+
+def test_miss_fills_then_hit_skips_loader():
+    cache = server.DocumentCache(max_entries=10, max_bytes=10_000, verify=False)
+    calls = []
+    doc = {"id": "tc-1", "name": "login", "revision": 1}
+
+    first = asyncio.run(cache.get("test_cases", "tc-1", loader_for(doc, calls)))
+    second = asyncio.run(cache.get("test_cases", "tc-1", loader_for(doc, calls)))
+
+    assert first == second == doc
+    assert calls == ["tc-1"]
+    assert cache.stats["misses"] == 1 and cache.stats["hits"] == 1
+    # Callers get copies, so mutating a result can't corrupt the entry
+    second["name"] = "changed"
+    assert asyncio.run(cache.get("test_cases", "tc-1", loader_for(doc, calls)))["name"] == "login"
+
+
+def test_invalidate_forces_reload():
+    cache = server.DocumentCache(max_entries=10, max_bytes=10_000, verify=False)
+    calls = []
+    doc = {"id": "tc-1", "revision": 1}
+    asyncio.run(cache.get("test_cases", "tc-1", loader_for(doc, calls)))
+
+    cache.invalidate("test_cases", "tc-1")
+    asyncio.run(cache.get("test_cases", "tc-1", loader_for(doc, calls)))
+
+    assert calls == ["tc-1", "tc-1"]
+    assert cache.bytes == cache.entries[("test_cases", "tc-1")][1]
+
+
+def test_fill_racing_an_invalidation_is_discarded():
+    cache = server.DocumentCache(max_entries=10, max_bytes=10_000, verify=False)
+
+    async def stale_load():
+        # A write lands while the old version is still being read
+        cache.invalidate("test_cases", "tc-1")
+        return {"id": "tc-1", "revision": 1}
+
+    doc = asyncio.run(cache.get("test_cases", "tc-1", stale_load))
+
+    assert doc["revision"] == 1
+    assert ("test_cases", "tc-1") not in cache.entries
+    assert cache.filling == {}
+    assert cache.stats["stale_fills_discarded"] == 1
+
+
+def test_byte_bound_evicts_least_recently_used():
+    doc_size = len(server.json.dumps({"id": "a", "pad": "x" * 50}))
+    cache = server.DocumentCache(max_entries=10, max_bytes=doc_size * 2, verify=False)
+    for doc_id in ("a", "b"):
+        cache.put("test_cases", doc_id, {"id": doc_id, "pad": "x" * 50})
+    calls = []
+    asyncio.run(cache.get("test_cases", "a", loader_for({"id": "a"}, calls)))  # "b" is now oldest
+
+    cache.put("test_cases", "c", {"id": "c", "pad": "x" * 50})
+
+    assert list(cache.entries) == [("test_cases", "a"), ("test_cases", "c")]
+    assert cache.bytes <= cache.max_bytes
+    assert cache.stats["evictions"] == 1
+    # A single document larger than the whole budget is never stored
+    cache.put("test_cases", "huge", {"id": "huge", "pad": "x" * doc_size * 3})
+    assert ("test_cases", "huge") not in cache.entries
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def find_one(self, query, projection=None):
+        return self.docs.get(query["id"])
+
+
+def test_verify_drops_entries_written_by_another_worker(monkeypatch):
+    stored = {"tc-1": {"id": "tc-1", "revision": 1}}
+    monkeypatch.setattr(server, "db", {"test_cases": FakeCollection(stored)})
+    cache = server.DocumentCache(max_entries=10, max_bytes=10_000)
+    calls = []
+    asyncio.run(cache.get("test_cases", "tc-1", loader_for(stored["tc-1"], calls)))
+
+    stored["tc-1"] = {"id": "tc-1", "revision": 2}
+    doc = asyncio.run(cache.get("test_cases", "tc-1", loader_for(stored["tc-1"], calls)))
+
+    assert doc["revision"] == 2
+    assert calls == ["tc-1", "tc-1"]
+
+
+class InvalidatingCollection:
+    def __init__(self, cache, doc):
+        self.cache = cache
+        self.doc = doc
+
+    async def find_one(self, query, projection=None):
+        # A write to the same document lands while the hit is being verified
+        self.cache.invalidate("test_executions", query["id"])
+        return self.doc
+
+
+def test_verify_treats_entry_invalidated_mid_check_as_a_miss(monkeypatch):
+    cache = server.DocumentCache(max_entries=10, max_bytes=10_000)
+    doc = {"id": "e1", "revision": 1}
+    monkeypatch.setattr(server, "db", {"test_executions": InvalidatingCollection(cache, doc)})
+    cache.put("test_executions", "e1", doc)
+    calls = []
+
+    result = asyncio.run(cache.get("test_executions", "e1", loader_for(doc, calls)))
+
+    assert result == doc
+    assert calls == ["e1"]
+    assert cache.stats["hits"] == 0 and cache.stats["misses"] == 1
@@ -0,0 +1,179 @@
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+
+JUNIT_REPORT = b"""<?xml version="1.0"?>
+<testsuites>
+  <testsuite name="auth">
+    <testcase classname="auth.Login" name="test_ok" time="0.25"/>
+    <testcase classname="auth.Login" name="test_bad_password" time="1.5">
+      <failure message="expected 401">Traceback\nAssertionError</failure>
+      <system-out>attempt 1\nattempt 2</system-out>
+    </testcase>
+    <testcase name="test_flaky"><skipped message="quarantined"/></testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def collect(results):
+    async def run():
+        return [result async for result in results]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_junit_results_across_chunk_boundaries(chunk_size):
+    results = collect(server.iter_junit_results(chunked(JUNIT_REPORT, chunk_size)))
+    assert [r["name"] for r in results] == ["auth.Login.test_ok", "auth.Login.test_bad_password", "test_flaky"]
+    assert [r["status"] for r in results] == ["completed", "failed", "skipped"]
+    assert results[1]["duration"] == 1.5
+    assert results[1]["message"] == "expected 401"
+    assert results[1]["logs"] == ["Traceback\nAssertionError", "attempt 1", "attempt 2"]
+    assert results[2]["message"] == "quarantined"
+
+
+def test_junit_invalid_time_is_a_report_error():
+    report = b'<testsuite><testcase name="t" time="1,5"/></testsuite>'
+    with pytest.raises(server.ReportError, match="JUnit XML.*1,5"):
+        collect(server.iter_junit_results(chunked(report, 64)))
+
+
+def test_junit_malformed_xml_is_a_report_error():
+    with pytest.raises(server.ReportError, match="JUnit XML"):
+        collect(server.iter_junit_results(chunked(b"<testsuite><testcase></testsuite>", 64)))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_csv_results_with_bom_blank_lines_and_quoted_newlines(chunk_size):
+    report = (
+        '\ufeffName,Status,Duration,Message,Logs\n'
+        '\n'
+        'login works,passed,1.5,,\n'
+        '"quoted, name",failed,2,"multi\nline","a\nb"\n'
+        '\n'
+        'flaky,skip,,,'
+    ).encode("utf-8")
+    results = collect(server.iter_csv_results(chunked(report, chunk_size)))
+    assert [r["name"] for r in results] == ["login works", "quoted, name", "flaky"]
+    assert [r["status"] for r in results] == ["completed", "failed", "skipped"]
+    assert results[1]["message"] == "multi\nline"
+    assert results[1]["logs"] == ["a", "b"]
+    assert results[0]["duration"] == 1.5
+
+
+@pytest.mark.parametrize("report, match", [
+    (b"name,result\na,passed\n", "'name' and 'status'"),
+    (b"name,status\na,exploded\n", "unknown status"),
+    (b"name,status,duration\na,passed,fast\n", "non-numeric duration"),
+    (b"name,status\n\xff\n", "CSV report"),
+])
+def test_csv_errors_are_report_errors(report, match):
+    with pytest.raises(server.ReportError, match=match):
+        collect(server.iter_csv_results(chunked(report, 64)))
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    async def to_list(self, length):
+        return self.docs if length is None else self.docs[:length]
+
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+
+    def matches(self, doc, query):
+        return all(
+            doc.get(field) in condition["$in"] if isinstance(condition, dict) else doc.get(field) == condition
+            for field, condition in query.items()
+        )
+
+    def find(self, query, projection=None):
+        return FakeCursor([doc for doc in self.docs if self.matches(doc, query)])
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs.extend(docs)
+
+    async def bulk_write(self, operations, ordered=True):
+        upserted = 0
+        for op in operations:
+            # Yield between operations so concurrent ingests interleave like real round-trips
+            await asyncio.sleep(0)
+            if not any(self.matches(doc, op._filter) for doc in self.docs):
+                self.docs.append(dict(op._doc["$setOnInsert"]))
+                upserted += 1
+        return type("BulkWriteResult", (), {"upserted_count": upserted})()
+
+
+def use_fake_db(monkeypatch, test_cases=None):
+    fake_db = type("FakeDb", (), {})()
+    fake_db.test_cases = FakeCollection(test_cases)
+    fake_db.test_executions = FakeCollection()
+    monkeypatch.setattr(server, "db", fake_db)
+    revisions = iter(range(100, 10_000, 100))
+
+    @asynccontextmanager
+    async def reserve_revisions(count=1):
+        yield next(revisions) + count
+
+    monkeypatch.setattr(server, "reserve_revisions", reserve_revisions)
+    return fake_db
+
+
+def test_ingest_batch_matches_existing_and_creates_missing_test_cases(monkeypatch):
+    existing = {"id": "tc-1", "project_id": "p1", "name": "login", "created_at": "2024-01-01"}
+    fake_db = use_fake_db(monkeypatch, [existing])
+
+    results = [
+        {"name": "login", "status": "completed", "duration": 0.5, "message": None, "logs": []},
+        {"name": "logout", "status": "failed", "duration": 1.0, "message": "boom", "logs": ["trace"]},
+        {"name": "logout", "status": "completed", "duration": 1.0, "message": None, "logs": []},
+    ]
+    created = asyncio.run(server.ingest_batch("p1", results, {"id": "user-1"}))
+
+    assert created == 1
+    new_case = fake_db.test_cases.docs[-1]
+    assert new_case["name"] == "logout" and new_case["project_id"] == "p1" and new_case["source"] == "ci"
+    executions = fake_db.test_executions.docs
+    assert [ex["test_case_id"] for ex in executions] == ["tc-1", new_case["id"], new_case["id"]]
+    assert [ex["result"] for ex in executions] == ["passed", "boom", "passed"]
+    assert all(ex["project_id"] == "p1" for ex in executions)
+    # Test case and executions share one contiguous block of revisions
+    assert [new_case["revision"]] + [ex["revision"] for ex in executions] == [101, 102, 103, 104]
+
+
+def test_concurrent_ingests_share_one_new_test_case(monkeypatch):
+    fake_db = use_fake_db(monkeypatch)
+    results = [{"name": "signup", "status": "completed", "duration": 0.1, "message": None, "logs": []}]
+
+    async def run():
+        return await asyncio.gather(*(server.ingest_batch("p1", results, {"id": "user-1"}) for _ in range(3)))
+
+    created = asyncio.run(run())
+
+    assert sorted(created) == [0, 0, 1]
+    assert len(fake_db.test_cases.docs) == 1
+    test_case_id = fake_db.test_cases.docs[0]["id"]
+    assert [ex["test_case_id"] for ex in fake_db.test_executions.docs] == [test_case_id] * 3
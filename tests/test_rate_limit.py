@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+
+
+@pytest.mark.parametrize("value", ["10,0", "10,-1", "0,5"])
+def test_parse_rate_limit_rejects_unusable_limits(monkeypatch, value):
+    monkeypatch.setenv("RATE_LIMIT_TEST", value)
+    with pytest.raises(ValueError, match="RATE_LIMIT_TEST"):
+        server.parse_rate_limit("RATE_LIMIT_TEST", "1,1")
+
+
+def test_parse_rate_limit_reads_capacity_and_rate(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_TEST", "5,0.5")
+    assert server.parse_rate_limit("RATE_LIMIT_TEST", "1,1") == (5.0, 0.5)
+
+
+def test_sweep_drops_only_refilled_buckets():
+    limiter = server.RateLimiter()
+    capacity, per_second = server.RATE_LIMITS["read"]
+    limiter.buckets = {
+        ("idle", "read"): [capacity - 1, 0.0],
+        ("busy", "read"): [0.0, 100.0],
+    }
+
+    limiter.sweep(100.0)
+
+    assert list(limiter.buckets) == [("busy", "read")]
+    assert limiter.take_memory(("idle", "read"), capacity, per_second) == 0.0
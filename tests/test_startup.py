@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("numpy")
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+# server.py's own import time as a share of importing the frameworks it is built
+# on, so the budget scales with the machine running the test
+IMPORT_OVERHEAD_RATIO = float(os.environ.get("IMPORT_OVERHEAD_RATIO", "0.22"))
+# Startup hooks (indexes, one-off backfills) against an empty database
+STARTUP_HOOKS_BUDGET_SECONDS = float(os.environ.get("STARTUP_HOOKS_BUDGET_SECONDS", "1.0"))
+RUNS = 5
+
+IMPORT_WITH_BASELINE = """
+import json, time
+started = time.perf_counter()
+import fastapi, fastapi.security, starlette.middleware.cors, motor.motor_asyncio, pymongo, pydantic, email_validator, dotenv, bcrypt, jwt
+frameworks = time.perf_counter()
+import server
+print(json.dumps({"frameworks": frameworks - started, "server": time.perf_counter() - frameworks}))
+"""
+
+IMPORT_SERVER = """
+import json, sys
+import server
+print(json.dumps({"lazy_loaded": [name for name in (server.LLM_CHAT_MODULE, "numpy") if name in sys.modules]}))
+"""
+
+START_APP = """
+import json, time
+import server
+from fastapi.testclient import TestClient
+started = time.perf_counter()
+with TestClient(server.app):
+    hooks = time.perf_counter() - started
+print(json.dumps({"hooks": hooks, "timings": server.STARTUP_TIMINGS}))
+"""
+
+
+def run_python(code, env=None):
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        env={**os.environ, **(env or {})},
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_server_import_overhead_within_budget():
+    # Best of N so a single slow filesystem read doesn't fail the run
+    runs = [json.loads(run_python(IMPORT_WITH_BASELINE)) for _ in range(RUNS)]
+    frameworks = min(run["frameworks"] for run in runs)
+    overhead = min(run["server"] for run in runs)
+    assert overhead < frameworks * IMPORT_OVERHEAD_RATIO, (
+        f"server import adds {overhead * 1000:.0f}ms on top of {frameworks * 1000:.0f}ms of frameworks"
+    )
+
+
+def test_optional_heavy_modules_not_imported_at_boot():
+    assert json.loads(run_python(IMPORT_SERVER))["lazy_loaded"] == []
+
+
+def mongo_url():
+    from dotenv import dotenv_values
+    return os.environ.get("MONGO_URL") or dotenv_values(BACKEND_DIR / ".env").get("MONGO_URL")
+
+
+def test_app_startup_hooks_within_budget():
+    pymongo = pytest.importorskip("pymongo")
+    url = mongo_url()
+    if not url:
+        pytest.skip("MONGO_URL is not configured")
+    admin = pymongo.MongoClient(url, serverSelectionTimeoutMS=1000)
+    try:
+        admin.admin.command("ping")
+    except pymongo.errors.PyMongoError:
+        pytest.skip("MongoDB is not reachable")
+
+    db_name = f"startup_bench_{uuid.uuid4().hex[:8]}"
+    try:
+        first = json.loads(run_python(START_APP, {"DB_NAME": db_name}))
+        # Indexes exist and the backfills are marked done on later boots
+        again = json.loads(run_python(START_APP, {"DB_NAME": db_name}))
+    finally:
+        admin.drop_database(db_name)
+        admin.close()
+
+    for boot in (first, again):
+        assert boot["hooks"] < STARTUP_HOOKS_BUDGET_SECONDS, f"startup hooks took {boot['hooks']:.2f}s: {boot['timings']}"
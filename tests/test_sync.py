@@ -0,0 +1,187 @@
+import asyncio
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+
+USER = {"id": "user-1"}
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return self.docs if length is None else self.docs[:length]
+
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+
+    def matches(self, doc, query):
+        for field, condition in query.items():
+            value = doc.get(field)
+            if field == "revision" and "$gt" in condition:
+                if value is None or value <= condition["$gt"]:
+                    return False
+            elif field == "revision":
+                if (value is not None) == (not condition["$exists"]):
+                    return False
+            elif isinstance(condition, dict):
+                if value not in condition["$in"]:
+                    return False
+            elif condition not in (value if isinstance(value, list) else [value]):
+                return False
+        return True
+
+    def find(self, query, projection=None, session=None):
+        return FakeCursor([dict(doc) for doc in self.docs if self.matches(doc, query)])
+
+    async def find_one(self, query, projection=None):
+        found = [doc for doc in self.docs if self.matches(doc, query)]
+        return found[0] if found else None
+
+    async def distinct(self, field, query, session=None):
+        return [doc[field] for doc in self.docs if self.matches(doc, query)]
+
+    async def bulk_write(self, operations, ordered=True):
+        for op in operations:
+            for doc in self.docs:
+                if doc["_id"] == op._filter["_id"] and "revision" not in doc:
+                    doc.update(op._doc["$set"])
+
+
+class FakeDb:
+    def __init__(self, **collections):
+        for name in ("counters",) + server.SYNC_COLLECTIONS:
+            setattr(self, name, FakeCollection(collections.get(name)))
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+def use_db(monkeypatch, **collections):
+    fake = FakeDb(**collections)
+    monkeypatch.setattr(server, "db", fake)
+    return fake
+
+
+def counter(value, *pending_ages):
+    now = time.time()
+    return {"_id": "revision", "value": value, "pending": [{"rev": rev, "at": now - age} for rev, age in pending_ages]}
+
+
+def test_committed_revision_without_counter_is_zero(monkeypatch):
+    use_db(monkeypatch)
+    assert asyncio.run(server.committed_revision()) == 0
+
+
+def test_committed_revision_stops_below_the_oldest_pending_reservation(monkeypatch):
+    use_db(monkeypatch, counters=[counter(10, (7, 1), (9, 1))])
+    assert asyncio.run(server.committed_revision()) == 6
+
+
+def test_committed_revision_ignores_timed_out_reservations(monkeypatch):
+    timeout = server.REVISION_RESERVATION_TIMEOUT
+    use_db(monkeypatch, counters=[counter(10, (3, timeout + 5), (9, 1))])
+    assert asyncio.run(server.committed_revision()) == 8
+    use_db(monkeypatch, counters=[counter(10, (3, timeout + 5))])
+    assert asyncio.run(server.committed_revision()) == 10
+
+
+def scoped(revisions, **fields):
+    return [{"id": f"doc-{revision}", "project_id": "p1", "revision": revision, **fields} for revision in revisions]
+
+
+def get_changes(monkeypatch, since, limit, committed):
+    async def committed_revision():
+        return committed
+    monkeypatch.setattr(server, "committed_revision", committed_revision)
+    return asyncio.run(server.get_changes(since=since, limit=limit, current_user=USER, session=None))
+
+
+def test_truncated_page_holds_the_watermark_at_its_last_revision(monkeypatch):
+    use_db(
+        monkeypatch,
+        projects=[{"id": "p1", "team_members": ["user-1"], "revision": 1}],
+        test_cases=scoped([2, 3, 4, 9]),
+        bugs=scoped([5, 8]),
+    )
+
+    page = get_changes(monkeypatch, since=1, limit=2, committed=100)
+
+    # bugs reached 8, but test_cases stopped at 3 with more to come
+    assert page["watermark"] == 3 and page["has_more"] is True
+    assert [doc["revision"] for doc in page["bugs"]] == [5, 8]
+
+    page = get_changes(monkeypatch, since=3, limit=2, committed=100)
+    assert [doc["revision"] for doc in page["test_cases"]] == [4, 9]
+    assert page["watermark"] == 8 and page["has_more"] is True
+
+    page = get_changes(monkeypatch, since=8, limit=2, committed=100)
+    assert page["test_cases"][0]["revision"] == 9 and page["watermark"] == 9 and page["has_more"] is False
+
+
+def test_watermark_never_passes_an_uncommitted_revision(monkeypatch):
+    use_db(
+        monkeypatch,
+        projects=[{"id": "p1", "team_members": ["user-1"], "revision": 1}],
+        test_cases=scoped([4, 6]),
+    )
+
+    assert get_changes(monkeypatch, since=0, limit=10, committed=5)["watermark"] == 5
+    # Nor moves backwards when the committed revision lags the client
+    assert get_changes(monkeypatch, since=6, limit=10, committed=5)["watermark"] == 6
+
+
+def test_changes_are_scoped_to_the_users_projects(monkeypatch):
+    use_db(
+        monkeypatch,
+        projects=[
+            {"id": "p1", "team_members": ["user-1"], "revision": 1},
+            {"id": "p2", "team_members": ["user-2"], "revision": 2},
+        ],
+        bugs=scoped([3]) + [{"id": "foreign", "project_id": "p2", "revision": 4}],
+    )
+
+    page = get_changes(monkeypatch, since=0, limit=10, committed=100)
+
+    assert [doc["id"] for doc in page["projects"]] == ["p1"]
+    assert [doc["id"] for doc in page["bugs"]] == ["doc-3"]
+
+
+def test_backfill_gives_each_legacy_document_its_own_revision(monkeypatch):
+    fake = use_db(
+        monkeypatch,
+        projects=[{"_id": 1, "id": "p1", "team_members": ["user-1"]}],
+        bugs=[{"_id": n, "id": f"b{n}", "project_id": "p1"} for n in range(2, 5)] + [{"_id": 9, "id": "new", "revision": 7}],
+    )
+    revisions = iter([10, 13])
+
+    @asynccontextmanager
+    async def reserve_revisions(count=1):
+        yield next(revisions)
+
+    monkeypatch.setattr(server, "reserve_revisions", reserve_revisions)
+    asyncio.run(server.backfill_revisions())
+
+    assert fake.projects.docs[0]["revision"] == 10
+    assert [doc["revision"] for doc in fake.bugs.docs] == [11, 12, 13, 7]
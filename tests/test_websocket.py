@@ -0,0 +1,135 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("motor")
+pytest.importorskip("numpy")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        self.sent.append(message)
+
+
+def snapshot_loader(monkeypatch, logs):
+    async def find_execution(exec_id):
+        return {"id": exec_id, "logs": list(logs)}
+    monkeypatch.setattr(server, "find_execution", find_execution)
+
+
+def publish(manager, exec_id, *contents):
+    async def run():
+        for content in contents:
+            await manager.send_message(exec_id, {"type": "log", "content": content})
+    asyncio.run(run())
+
+
+def resume(manager, exec_id, since, boot):
+    socket = FakeWebSocket()
+    asyncio.run(manager.replay(socket, exec_id, since, boot))
+    return socket.sent
+
+
+def test_resume_replays_only_missed_messages():
+    manager = server.ConnectionManager()
+    publish(manager, "e1", "a", "b", "c")
+
+    sent = resume(manager, "e1", 1, manager.boot_id)
+
+    assert [(m["content"], m["seq"]) for m in sent] == [("b", 2), ("c", 3)]
+    assert all(m["boot"] == manager.boot_id for m in sent)
+
+
+def test_other_streams_do_not_trigger_a_snapshot():
+    manager = server.ConnectionManager()
+    publish(manager, "e1", "a")
+    publish(manager, "e2", "x", "y")
+    publish(manager, "e1", "b")
+
+    sent = resume(manager, "e1", 1, manager.boot_id)
+
+    assert [(m["content"], m["seq"]) for m in sent] == [("b", 4)]
+
+
+def test_resume_below_the_ring_floor_sends_a_snapshot(monkeypatch):
+    monkeypatch.setattr(server, "REPLAY_RING_SIZE", 2)
+    manager = server.ConnectionManager()
+    publish(manager, "e1", "a", "b", "c", "d")
+    snapshot_loader(monkeypatch, ["a", "b", "c", "d"])
+
+    assert manager.replay_rings["e1"]["floor"] == 2
+    sent = resume(manager, "e1", 1, manager.boot_id)
+
+    assert [m["type"] for m in sent] == ["snapshot"]
+    assert sent[0]["seq"] == 4 and sent[0]["data"]["logs"] == ["a", "b", "c", "d"]
+    # At the floor itself nothing is missing from the ring
+    assert [m["seq"] for m in resume(manager, "e1", 2, manager.boot_id)] == [3, 4]
+
+
+def test_evicted_stream_resumes_from_a_snapshot(monkeypatch):
+    monkeypatch.setattr(server, "REPLAY_MAX_STREAMS", 2)
+    manager = server.ConnectionManager()
+    publish(manager, "e1", "a")
+    publish(manager, "e2", "x")
+    publish(manager, "e3", "y")
+    snapshot_loader(monkeypatch, ["a"])
+
+    assert list(manager.replay_rings) == ["e2", "e3"]
+    assert [m["type"] for m in resume(manager, "e1", 1, manager.boot_id)] == ["snapshot"]
+
+
+def test_sequence_from_another_boot_sends_a_snapshot(monkeypatch):
+    manager = server.ConnectionManager()
+    publish(manager, "e1", "a", "b", "c")
+    snapshot_loader(monkeypatch, ["a", "b", "c"])
+
+    # A client of a previous process whose sequence falls inside this one's range
+    sent = resume(manager, "e1", 2, "previous-boot")
+
+    assert [m["type"] for m in sent] == ["snapshot"]
+    assert sent[0]["boot"] == manager.boot_id
+
+
+@pytest.mark.parametrize("read_first", [True, False])
+def test_log_published_during_snapshot_is_delivered_once(monkeypatch, read_first):
+    manager = server.ConnectionManager()
+    stored = []
+    socket = FakeWebSocket()
+
+    async def push_log():
+        async with manager.publishing("e1"):
+            stored.append("late")
+            await manager.send_message("e1", {"type": "log", "content": "late"})
+
+    async def find_execution(exec_id):
+        # The write starts while the snapshot is being read, landing either
+        # after the read (must be replayed) or before it (must not be)
+        logs = list(stored)
+        asyncio.get_running_loop().create_task(push_log())
+        await asyncio.sleep(0)
+        return {"id": exec_id, "logs": logs if read_first else list(stored)}
+
+    monkeypatch.setattr(server, "find_execution", find_execution)
+
+    async def run():
+        await manager.connect(socket, "e1", since=0, boot="previous-boot")
+        while manager.locks:
+            await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    delivered = list(socket.sent[0]["data"]["logs"]) + [m["content"] for m in socket.sent[1:]]
+    assert delivered == ["late"]
+    assert manager.locks == {}